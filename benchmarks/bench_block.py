@@ -0,0 +1,191 @@
+"""
+Benchmarks of the Text Highlighter hot paths against the stand-in runtime.
+
+Usage:
+
+    python -m benchmarks.bench_block [--repeat N] [--sizes 1000,10000,...] [--only student_view,...]
+
+Every case reports latency percentiles and the peak of memory allocated per call. The block dependencies
+(XBlock, xblock-utils) and Django must be installed, edx-platform modules are replaced by shims.
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.legacy import LegacyAnswersStat
+from benchmarks.runtime import FakeRuntime, call_handler, make_block
+from text_highlighter.text_highlighter import AnswersStat, render_cache
+from text_highlighter.tokens import find_tokens
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+WORDS = ["policy", "market", "growth", "river", "report", "energy", "signal", "budget", "vote", "tax"]
+
+
+def make_passage(size, tokenized, token_every=10):
+    """
+    Returns an html passage of about `size` characters and its token texts.
+    """
+    rnd = random.Random(size)
+    parts = []
+    tokens = []
+    length = 0
+    word_num = 0
+    while length < size:
+        word = f"{rnd.choice(WORDS)}{word_num}"
+        if tokenized and word_num % token_every == 0:
+            tokens.append(word)
+            word = f"<token>{word}</token>"
+        if word_num % 100 == 0:
+            word = "<p>" + word
+        parts.append(word)
+        length += len(word) + 1
+        word_num += 1
+    return " ".join(parts), tokens
+
+
+def measure(func, repeat):
+    timings = []
+    peaks = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    timings.sort()
+
+    def percentile(p):
+        return timings[min(len(timings) - 1, int(round(p / 100.0 * (len(timings) - 1))))] * 1000
+
+    return {
+        'p50': percentile(50),
+        'p90': percentile(90),
+        'p99': percentile(99),
+        'mean': statistics.mean(timings) * 1000,
+        'peak_kb': max(peaks) / 1024.0,
+    }
+
+
+def report(name, result):
+    print(f"{name:<58} p50 {result['p50']:9.3f}ms  p90 {result['p90']:9.3f}ms  "
+          f"p99 {result['p99']:9.3f}ms  peak {result['peak_kb']:10.1f}KB")
+
+
+def editor_data(text, correct_answers, tokenized):
+    return {
+        'display_name': 'Benchmark',
+        'text': text,
+        'correct_answers': "\n".join(correct_answers),
+        'description': 'Benchmark block',
+        'grading_type': 'partial_credit',
+        'problem_weight': 1,
+        'display_correct_answers_after_response': True,
+        'use_tokenized_system': tokenized,
+        'non_limited_number_of_answers': True,
+        'max_attempts_number': 0,
+    }
+
+
+def saved_block(text, correct_answers, tokenized):
+    block = make_block(FakeRuntime())
+    call_handler(block, 'update_editor_context', editor_data(text, correct_answers, tokenized))
+    return block
+
+
+def publish_again(block, answers):
+    # the answers must be reset before they can be submitted again
+    block.user_answers = []
+    block.attempts = 0
+    return call_handler(block, 'publish_answers', {'answers': list(answers)})
+
+
+def bench_block_views(sizes, repeat, only):
+    for size in sizes:
+        for tokenized in (False, True):
+            text, tokens = make_passage(size, tokenized)
+            correct_answers = tokens[:20] if tokenized else WORDS[:5]
+            mode = 'tokens' if tokenized else 'free'
+            label = f"{size // 1000}KB/{mode}"
+            block = saved_block(text, correct_answers, tokenized)
+            answers = correct_answers[:10]
+
+            if 'update_editor_context' in only:
+                data = editor_data(text, correct_answers, tokenized)
+                report(f"update_editor_context {label}",
+                       measure(lambda: call_handler(make_block(FakeRuntime()), 'update_editor_context', dict(data)),
+                               repeat))
+            if 'student_view' in only:
+                render_cache.clear()
+                report(f"student_view (cold cache) {label}",
+                       measure(lambda: (render_cache.clear(), block.student_view()), repeat))
+                report(f"student_view {label}", measure(block.student_view, repeat))
+            if 'studio_view' in only:
+                report(f"studio_view {label}", measure(block.studio_view, repeat))
+            if 'publish_answers' in only:
+                report(f"publish_answers {label} answers={len(answers)}",
+                       measure(lambda: publish_again(block, answers), repeat))
+            if 'reset_answers' in only:
+                report(f"reset_answers {label}",
+                       measure(lambda: call_handler(block, 'reset_answers', {}), repeat))
+
+
+FUZZY_MATCHING = {'ignore_case': True, 'trim_punctuation': True, 'normalize_unicode': True, 'max_edits': 1}
+
+
+def bench_scoring(repeat, only):
+    if 'scoring' not in only:
+        return
+    for answers_num in (10, 100, 1000):
+        correct_answers = [f"answer {i}" for i in range(answers_num)]
+        responses = [[f"answer {i}" for i in range(0, answers_num * 2, 2)] for _ in range(100)]
+        report(f"scoring legacy list scan answers={answers_num} x100",
+               measure(lambda: [LegacyAnswersStat(correct_answers, resp, 1, 'plus_minus') for resp in responses],
+                       repeat))
+        report(f"scoring AnswersStat.batch answers={answers_num} x100",
+               measure(lambda: AnswersStat.batch(correct_answers, responses, 1, 'plus_minus'), repeat))
+        fuzzy_responses = [[f"Answr {i}." for i in range(0, answers_num * 2, 2)] for _ in range(100)]
+        report(f"scoring AnswersStat.batch fuzzy answers={answers_num} x100",
+               measure(lambda: AnswersStat.batch(correct_answers, fuzzy_responses, 1, 'plus_minus', FUZZY_MATCHING),
+                       repeat))
+
+
+def bench_token_validation(sizes, repeat, only):
+    if 'token_validation' not in only:
+        return
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        BeautifulSoup = None
+    for size in sizes:
+        text, _ = make_passage(size, True)
+        report(f"token validation stdlib parser {size // 1000}KB", measure(lambda: find_tokens(text), repeat))
+        if BeautifulSoup is not None:
+            report(f"token validation BeautifulSoup {size // 1000}KB",
+                   measure(lambda: [tag.get_text() for tag in BeautifulSoup(text, 'html.parser').find_all('token')],
+                           repeat))
+
+
+ALL_CASES = ['update_editor_context', 'student_view', 'studio_view', 'publish_answers', 'reset_answers',
+             'scoring', 'token_validation']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Text Highlighter block.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--sizes', default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma separated passage sizes in characters")
+    parser.add_argument('--only', default=",".join(ALL_CASES), help="Comma separated cases to run")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    only = set(args.only.split(","))
+    bench_block_views(sizes, args.repeat, only)
+    bench_scoring(args.repeat, only)
+    bench_token_validation(sizes, args.repeat, only)
+
+
+if __name__ == '__main__':
+    main()
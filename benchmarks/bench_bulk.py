@@ -0,0 +1,55 @@
+"""
+Benchmark of the bulk export and import against local stand-in field stores.
+
+Usage:
+
+    python -m benchmarks.bench_bulk [--blocks 10000] [--learners 100] [--workers 0,4] [--chunk-size 1000]
+
+Exports `blocks x learners` learner rows generated on the fly to a temporary file, then imports the file into
+an in-memory store once per worker count. Reports the throughput and the peak resident memory of the process.
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.stores import MemoryFieldStore, SyntheticFieldStore
+from text_highlighter.bulk import export_blocks, import_blocks
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the bulk export and import.")
+    parser.add_argument('--blocks', type=int, default=10000)
+    parser.add_argument('--learners', type=int, default=100, help="Learner rows per block")
+    parser.add_argument('--workers', default="0,4", help="Comma separated validation pool sizes to compare")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    source = SyntheticFieldStore(args.blocks, args.learners)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'export.jsonl')
+        started = time.perf_counter()
+        with open(path, 'w', encoding='utf-8') as f:
+            records = export_blocks(source, f, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - started
+        print(f"export   {records:>9} records {elapsed:8.2f}s {records / elapsed:10.0f} rec/s  "
+              f"{os.path.getsize(path) / 2 ** 20:8.1f}MB file  peak rss {peak_rss_mb():8.1f}MB")
+
+        for workers in (int(workers) for workers in args.workers.split(",")):
+            target = MemoryFieldStore()
+            started = time.perf_counter()
+            with open(path, encoding='utf-8') as f:
+                summary = import_blocks(target, f, workers=workers, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - started
+            print(f"import   workers={workers:<3} {summary['blocks']:>7} blocks {summary['states']:>9} states "
+                  f"{elapsed:8.2f}s {(summary['blocks'] + summary['states']) / elapsed:10.0f} rec/s  "
+                  f"errors {len(summary['errors'])}  peak rss {peak_rss_mb():8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Import-time check of the package, run in a fresh interpreter with `python -X importtime`.
+
+Usage:
+
+    python -m benchmarks.bench_import [--max-ms 100]
+
+The same check runs in the test suite, see `tests/test_import_time.py`.
+
+Fails when importing `text_highlighter` pulls in modules that are only needed for rendering
+or grading, or when the cumulative import time exceeds the limit. Modules already imported by
+the XBlock dependencies the block classes are built on are not held against the package.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MAX_MS = 100.0
+
+# modules that must only be imported on first render or grading
+DEFERRED_MODULES = [
+    'django.template',
+    'xblockutils.resources',
+    'xblock.utils.resources',
+    'web_fragments.fragment',
+    'xmodule.graders',
+    'common.djangoapps.xblock_django.constants',
+]
+
+CHECK_SCRIPT = """
+import sys
+import xblock.core
+import xblockutils.settings
+baseline = set(sys.modules)
+import text_highlighter
+print(",".join(name for name in {deferred!r} if name in sys.modules and name not in baseline))
+"""
+
+
+def parse_importtime(stderr, module_name):
+    """
+    Returns the cumulative import time of the module in microseconds.
+    """
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        if name == module_name:
+            return int(cumulative)
+    return None
+
+
+def measure_import():
+    """
+    Imports the package in a fresh interpreter, returns the deferred modules it imported and its cumulative
+    import time in milliseconds (None if it could not be parsed).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHECK_SCRIPT.format(deferred=DEFERRED_MODULES)],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    imported = [name for name in result.stdout.strip().split(",") if name]
+    cumulative_us = parse_importtime(result.stderr, 'text_highlighter')
+    return imported, None if cumulative_us is None else cumulative_us / 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import time of the text_highlighter package.")
+    parser.add_argument('--max-ms', type=float, default=DEFAULT_MAX_MS)
+    args = parser.parse_args(argv)
+
+    imported, cumulative_ms = measure_import()
+    if cumulative_ms is not None:
+        print(f"import text_highlighter: {cumulative_ms:.1f}ms")
+
+    failed = False
+    if imported:
+        print(f"modules imported eagerly: {', '.join(imported)}")
+        failed = True
+    if cumulative_ms is None or cumulative_ms > args.max_ms:
+        print(f"import time above the {args.max_ms}ms limit")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
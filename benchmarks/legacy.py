@@ -0,0 +1,48 @@
+"""
+Scoring as implemented before the hashed answer key, kept as the reference the benchmarks and tests compare with.
+"""
+
+
+class LegacyAnswersStat:
+
+    def __init__(self, correct_answers, resp_answers, problem_weight=1, grading_type='all_or_nothing'):
+        self.correct_answers = correct_answers
+        self.correct_answers_total_num = len(correct_answers)
+        self.resp_answers = resp_answers
+        self.grading_type = grading_type
+        self.problem_weight = problem_weight if problem_weight and problem_weight >= 1 else 1
+        self.user_correct_answers_num = 0
+        self.percent_completion = 0
+        self.weighted_percent_completion = 0
+        self.user_correct_answers_num = sum([1 for ans in self.resp_answers if ans in self.correct_answers])
+
+        if self.user_correct_answers_num > self.correct_answers_total_num:
+            self.user_correct_answers_num = self.correct_answers_total_num
+
+        if self.correct_answers_total_num > 0:
+            if self.grading_type == 'all_or_nothing':
+                if self.user_correct_answers_num == self.correct_answers_total_num:
+                    self.percent_completion = 1
+                    self.weighted_percent_completion = self.problem_weight
+            elif self.grading_type == 'plus_minus':
+                incorrect_answers_num = len(self.resp_answers) - self.user_correct_answers_num
+                points = self.user_correct_answers_num - incorrect_answers_num
+                if points < 0:
+                    points = 0
+                self.percent_completion = float(points) / self.correct_answers_total_num
+                self.weighted_percent_completion = self.percent_completion * self.problem_weight
+            elif self.correct_answers_total_num > 0:
+                self.percent_completion = float(self.user_correct_answers_num) / self.correct_answers_total_num
+                self.weighted_percent_completion = self.percent_completion * self.problem_weight
+
+    def to_dict(self):
+        return {
+            'correct_answers': self.correct_answers,
+            'resp_answers': self.resp_answers,
+            'correct_answers_total_num': self.correct_answers_total_num,
+            'grading_type': self.grading_type,
+            'percent_completion': self.percent_completion,
+            'problem_weight': self.problem_weight,
+            'user_correct_answers_num': self.user_correct_answers_num,
+            'weighted_percent_completion': self.weighted_percent_completion,
+        }
@@ -0,0 +1,168 @@
+"""
+Lightweight stand-in XBlock runtime used to exercise the block outside of edx-platform.
+
+Installs shims for the edx-platform modules imported by the block and provides fake
+`user`, `user_state`, `i18n` and `settings` services.
+"""
+import json
+import sys
+import types
+
+from django.conf import settings as django_settings
+
+PLATFORM_SHIMS = {}
+
+
+def _install_module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    PLATFORM_SHIMS[name] = module
+    return module
+
+
+class ShowCorrectness:
+    ALWAYS = 'always'
+
+    @staticmethod
+    def correctness_available(show_correctness='', due_date=None, has_staff_access=False):
+        return show_correctness in ('', ShowCorrectness.ALWAYS) or has_staff_access
+
+
+def install_platform_shims():
+    """
+    Makes the edx-platform modules importable, unless the real platform is on the path.
+    """
+    try:
+        import xmodule.graders  # pylint: disable=unused-import
+    except ImportError:
+        _install_module('xmodule')
+        _install_module('xmodule.graders', ShowCorrectness=ShowCorrectness)
+    try:
+        import common.djangoapps.xblock_django.constants  # pylint: disable=unused-import
+    except ImportError:
+        _install_module('common')
+        _install_module('common.djangoapps')
+        _install_module('common.djangoapps.xblock_django')
+        _install_module('common.djangoapps.xblock_django.constants',
+                        ATTR_KEY_USER_IS_STAFF='edx-platform.user_is_staff')
+
+    if not django_settings.configured:
+        django_settings.configure(
+            USE_I18N=True,
+            TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'APP_DIRS': False}],
+        )
+        import django
+        django.setup()
+
+
+install_platform_shims()
+
+# pylint: disable=wrong-import-position
+from webob import Request
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+from xblock.runtime import MemoryIdManager, Runtime
+
+from text_highlighter import TextHighlighterBlock
+
+
+class FakeUser:
+    def __init__(self, is_staff=False):
+        self.opt_attrs = {'edx-platform.user_is_staff': is_staff}
+
+
+class FakeUserService:
+    def __init__(self, is_staff=False):
+        self.user = FakeUser(is_staff)
+        self.calls = 0
+
+    def get_current_user(self):
+        self.calls += 1
+        return self.user
+
+
+class FakeUserStateService:
+    def __init__(self, states=None):
+        self.states = states or {}
+
+    def get_state_as_dict(self, username, block_id):
+        return self.states.get(username, {})
+
+
+class FakeI18nService:
+    def gettext(self, text):
+        return text
+
+    ugettext = gettext
+
+    def ngettext(self, singular, plural, number):
+        return singular if number == 1 else plural
+
+    ungettext = ngettext
+
+
+class FakeSettingsService:
+    def __init__(self, xblock_settings=None):
+        self.xblock_settings = xblock_settings or {}
+
+    def get_settings_bucket(self, block, default=None):
+        return self.xblock_settings.get(block.block_settings_key, default)
+
+
+class FakeRuntime(Runtime):
+    """
+    Runtime keeping all fields in memory and recording published events.
+    """
+
+    def __init__(self, services=None):
+        all_services = {
+            'user': FakeUserService(),
+            'user_state': FakeUserStateService(),
+            'i18n': FakeI18nService(),
+            'settings': FakeSettingsService(),
+        }
+        all_services.update(services or {})
+        id_manager = MemoryIdManager()
+        super().__init__(id_reader=id_manager, id_generator=id_manager, field_data=DictFieldData({}),
+                         services=all_services)
+        self.events = []
+
+    def handler_url(self, block, handler_name, suffix='', query='', thirdparty=False):
+        return f'/handler/{handler_name}/{suffix}'
+
+    def local_resource_url(self, block, uri):
+        return f'/resource/{block.scope_ids.block_type}/{uri}'
+
+    def resource_url(self, resource):
+        return f'/static/{resource}'
+
+    def publish(self, block, event_type, event_data):
+        self.events.append((event_type, event_data))
+
+
+def make_block(runtime=None, **fields):
+    """
+    Returns a TextHighlighterBlock with the given field values and the attributes edx-platform mixes in.
+    """
+    runtime = runtime or FakeRuntime()
+    def_id = runtime.id_generator.create_definition('text-highlighter')
+    usage_id = runtime.id_generator.create_usage(def_id)
+    block = runtime.construct_xblock_from_class(
+        TextHighlighterBlock, ScopeIds('student', 'text-highlighter', def_id, usage_id)
+    )
+    block.graded = True
+    block.show_correctness = 'always'
+    block.close_date = None
+    for name, value in fields.items():
+        setattr(block, name, value)
+    return block
+
+
+def call_handler(block, handler_name, data):
+    """
+    Calls a JSON handler of the block the way the runtime does and returns the decoded response.
+    """
+    request = Request.blank('/', method='POST', body=json.dumps(data).encode('utf-8'))
+    response = getattr(block, handler_name)(request)
+    return json.loads(response.body.decode('utf-8'))
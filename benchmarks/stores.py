@@ -0,0 +1,149 @@
+"""
+Local stand-in field stores for the bulk and concurrency benchmarks.
+"""
+import json
+import random
+import sqlite3
+
+from text_highlighter.bulk import FieldStore
+from text_highlighter.state import STATE_FIELDS, UserStateStore
+from text_highlighter.text_highlighter import encode_answers, extend_answer_table
+
+
+class MemoryFieldStore(FieldStore):
+    """
+    Keeps block settings and learner states in dicts.
+    """
+
+    def __init__(self):
+        self.blocks = {}
+        self.user_states = {}
+        self.answer_statistics = {}
+
+    def iter_blocks(self):
+        return iter(self.blocks.items())
+
+    def get_block(self, usage_id):
+        return self.blocks.get(usage_id)
+
+    def save_block(self, usage_id, fields):
+        self.blocks.setdefault(usage_id, {}).update(fields)
+
+    def iter_user_states(self, usage_id):
+        return iter(self.user_states.get(usage_id, {}).items())
+
+    def save_user_states(self, usage_id, states):
+        block_states = self.user_states.setdefault(usage_id, {})
+        for user_id, state in states:
+            block_states.setdefault(user_id, {}).update(state)
+
+    def save_answer_statistics(self, usage_id, statistics):
+        self.answer_statistics[usage_id] = statistics
+
+
+class SyntheticFieldStore(FieldStore):
+    """
+    Read-only store generating `blocks_num` blocks with `learners_num` learner states each on the fly,
+    so exporting a million learner rows does not need them in memory.
+    """
+    WORDS = ["policy", "market", "growth", "river", "report", "energy", "signal", "budget", "vote", "tax"]
+
+    def __init__(self, blocks_num, learners_num, tokenized_every=2):
+        self.blocks_num = blocks_num
+        self.learners_num = learners_num
+        self.tokenized_every = tokenized_every
+
+    def _block(self, block_num):
+        words = [f"{self.WORDS[(block_num + i) % len(self.WORDS)]}{i}" for i in range(40)]
+        tokenized = block_num % self.tokenized_every == 0
+        correct_answers = sorted(words[::8])
+        if tokenized:
+            text = "<p>" + " ".join(f"<token>{word}</token>" if i % 4 == 0 else word
+                                    for i, word in enumerate(words)) + "</p>"
+        else:
+            text = "<p>" + " ".join(words) + "</p>"
+        return {
+            'display_name': f"Highlighter {block_num}",
+            'description': "Select the key words",
+            'text': text,
+            'use_tokenized_system': tokenized,
+            'correct_answers': correct_answers,
+            'non_limited_number_of_answers': True,
+            'grading_type': 'partial_credit',
+            'weight': 1.0,
+            'display_correct_answers_after_response': True,
+            'max_attempts_number': 3,
+            'answer_table': extend_answer_table([], correct_answers),
+        }
+
+    def iter_blocks(self):
+        for block_num in range(self.blocks_num):
+            yield f"block-v1:Org+Course+Run+type@text-highlighter+block@{block_num}", self._block(block_num)
+
+    def get_block(self, usage_id):
+        return self._block(int(usage_id.rsplit('@', 1)[1]))
+
+    def iter_user_states(self, usage_id):
+        settings = self.get_block(usage_id)
+        answer_ids = {answer: answer_id for answer_id, answer in enumerate(settings['answer_table'])}
+        rnd = random.Random(usage_id)
+        for learner_num in range(self.learners_num):
+            answers = rnd.sample(settings['correct_answers'], 3) + [f"extra{learner_num % 7}"]
+            yield f"user{learner_num}", {
+                'user_answers': encode_answers(sorted(answers), answer_ids),
+                'attempts': 1 + learner_num % 3,
+            }
+
+
+class SqliteStateStore(UserStateStore):
+    """
+    Learner states shared by processes in a SQLite database, compare-and-set runs in a write transaction.
+
+    With `check_version=False` the versions are ignored, i.e. the last write wins like with plain field data.
+    """
+    DEFAULT_STATE = {'user_answers': None, 'draft_answers': [], 'attempts': 0, 'last_submission_id': None}
+
+    def __init__(self, path, check_version=True):
+        self.path = path
+        self.check_version = check_version
+        self._connection = None
+
+    def _db(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS user_state ("
+                "usage_id TEXT, user_id TEXT, version INTEGER, state TEXT, PRIMARY KEY (usage_id, user_id))"
+            )
+        return self._connection
+
+    @staticmethod
+    def _key(block):
+        return str(block.scope_ids.usage_id), str(block.scope_ids.user_id)
+
+    def _select(self, key):
+        row = self._db().execute(
+            "SELECT version, state FROM user_state WHERE usage_id = ? AND user_id = ?", key
+        ).fetchone()
+        if row is None:
+            return 0, dict(self.DEFAULT_STATE)
+        return row[0], json.loads(row[1])
+
+    def load(self, block):
+        version, state = self._select(self._key(block))
+        return version, {name: state.get(name) for name in STATE_FIELDS}
+
+    def compare_and_set(self, block, expected_version, fields):
+        key = self._key(block)
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            version, state = self._select(key)
+            if self.check_version and version != expected_version:
+                return False
+            state.update(fields)
+            db.execute("INSERT OR REPLACE INTO user_state VALUES (?, ?, ?, ?)",
+                       key + (expected_version + 1, json.dumps(state)))
+            return True
+        finally:
+            db.execute("COMMIT")
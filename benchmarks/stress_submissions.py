@@ -0,0 +1,129 @@
+"""
+Concurrency stress test of the submissions of a learner, run by parallel processes against a shared SQLite
+stand-in of the learner state storage.
+
+Usage:
+
+    python -m benchmarks.stress_submissions [--processes 8] [--rounds 50] [--max-attempts 3] [--no-cas]
+
+Every process submits and resets the answers of the same learner in a loop, reusing submission ids across
+processes to simulate retries. The run fails when more submissions are accepted than `--max-attempts`, when a
+submission id is accepted twice without a reset in between or when the accepted submissions don't match the
+stored attempts.
+`--no-cas` ignores the state versions to show the races the compare-and-set prevents.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.runtime import FakeRuntime, call_handler, make_block
+from benchmarks.stores import SqliteStateStore
+
+
+class SlowSqliteStateStore(SqliteStateStore):
+    """
+    Waits between reading the state and writing it, like a request doing more work in between would.
+    """
+
+    def __init__(self, path, check_version=True, write_delay=0.0):
+        super().__init__(path, check_version)
+        self.write_delay = write_delay
+
+    def compare_and_set(self, block, expected_version, fields):
+        time.sleep(self.write_delay)
+        return super().compare_and_set(block, expected_version, fields)
+
+
+def run_learner(args):
+    db_path, process_num, rounds, max_attempts, check_version, write_delay, start_at = args
+    block = make_block(FakeRuntime())
+    call_handler(block, 'update_editor_context', {
+        'display_name': 'Stress',
+        'text': '<p>alpha beta gamma delta</p>',
+        'correct_answers': "alpha\ngamma",
+        'grading_type': 'partial_credit',
+        'max_attempts_number': max_attempts,
+    })
+    block.state_store = SlowSqliteStateStore(db_path, check_version, write_delay)
+    block.runtime.events = []
+    rnd = random.Random(process_num)
+
+    time.sleep(max(0.0, start_at - time.time()))
+    # (state version, submission id) of the accepted submissions and state versions of the resets
+    accepted = []
+    resets = []
+    responses = {'success': 0, 'error': 0}
+    for round_num in range(rounds):
+        # ids shared by the processes stand for retries of the same submission
+        submission_id = f"sub-{round_num}-{rnd.randint(0, 1)}"
+        events_num = len(block.runtime.events)
+        response = call_handler(block, 'publish_answers', {
+            'answers': rnd.sample(['alpha', 'beta', 'gamma'], 2),
+            'submission_id': submission_id,
+        })
+        responses[response.get('result', 'error')] += 1
+        if any(event_type == 'xblock.text-highlighter.new_submission'
+               for event_type, _ in block.runtime.events[events_num:]):
+            accepted.append((block.state_version, submission_id))
+        if rnd.random() < 0.5 and 'grade_text' in call_handler(block, 'reset_answers', {}):
+            resets.append(block.state_version)
+    usage_key = SqliteStateStore._key(block)  # pylint: disable=protected-access
+    return usage_key, accepted, resets, responses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress the submissions of a learner from parallel processes.")
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=50, help="Submissions per process")
+    parser.add_argument('--max-attempts', type=int, default=3)
+    parser.add_argument('--write-delay-ms', type=float, default=2.0,
+                        help="Delay between reading and writing the state")
+    parser.add_argument('--no-cas', action='store_true', help="Ignore the state versions")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'state.sqlite')
+        start_at = time.time() + 1.0
+        jobs = [(db_path, process_num, args.rounds, args.max_attempts, not args.no_cas,
+                 args.write_delay_ms / 1000.0, start_at) for process_num in range(args.processes)]
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.map(run_learner, jobs)
+        elapsed = time.perf_counter() - started
+
+        usage_keys = {usage_key for usage_key, _, _, _ in results}
+        accepted = sorted(submission for _, process_accepted, _, _ in results for submission in process_accepted)
+        resets = sorted(version for _, _, process_resets, _ in results for version in process_resets)
+        successes = sum(responses['success'] for _, _, _, responses in results)
+        errors = sum(responses['error'] for _, _, _, responses in results)
+        version, state = SqliteStateStore(db_path)._select(results[0][0])  # pylint: disable=protected-access
+
+    failures = []
+    if len(usage_keys) > 1:
+        failures.append("processes did not share the learner state")
+    if args.max_attempts and len(accepted) > args.max_attempts:
+        failures.append(f"{len(accepted)} submissions accepted with {args.max_attempts} attempts allowed")
+    # a reset clears the submission id, the same id submitted again afterwards is a new submission
+    for (previous_version, previous_id), (version, submission_id) in zip(accepted, accepted[1:]):
+        if submission_id == previous_id and not any(previous_version < reset < version for reset in resets):
+            failures.append(f"submission id {submission_id} was accepted twice without a reset in between")
+            break
+    if state['attempts'] != len(accepted):
+        failures.append(f"{len(accepted)} submissions accepted, {state['attempts']} attempts stored")
+
+    print(f"{args.processes} processes x {args.rounds} rounds in {elapsed:.2f}s: {len(accepted)} accepted, "
+          f"{successes} success responses (incl. retries), {errors} rejected, "
+          f"stored attempts {state['attempts']} (state version {version})")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
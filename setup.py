@@ -3,7 +3,9 @@
 # Imports ###########################################################
 
 import os
+import runpy
 from setuptools import setup
+from setuptools.command.build_py import build_py
 
 
 # Functions #########################################################
@@ -19,6 +21,22 @@ def package_data(pkg, root_list):
     return {pkg: data}
 
 
+def build_assets(package_dir):
+    """Generate the minified, content-hashed bundles of the static assets into `package_dir`."""
+    runpy.run_path(os.path.join("text_highlighter", "assets.py"))["build"](package_dir)
+
+
+# Classes ###########################################################
+
+class BuildPyWithAssets(build_py):
+    """Generates the asset bundles into the built package, the source tree is left as it is."""
+
+    def run(self):
+        super().run()
+        if not self.dry_run:
+            build_assets(os.path.join(self.build_lib, "text_highlighter"))
+
+
 # Main ##############################################################
 
 setup(
@@ -34,4 +52,5 @@ setup(
         'xblock.v1': 'text-highlighter = text_highlighter:TextHighlighterBlock',
     },
     package_data=package_data("text_highlighter", ["static", "templates", "public"]),
+    cmdclass={'build_py': BuildPyWithAssets},
 )
@@ -0,0 +1,60 @@
+from benchmarks.runtime import call_handler, make_block
+from text_highlighter.text_highlighter import decode_answers, encode_answers, extend_answer_table
+
+SETTINGS = {
+    'display_name': "Words",
+    'text': "<p>alpha beta gamma</p>",
+    'correct_answers': "alpha",
+    'grading_type': 'partial_credit',
+    'max_attempts_number': 0,
+}
+
+
+def test_encode_and_decode_answers():
+    answer_table = ['beta', 'alpha']
+    answer_ids = {answer: answer_id for answer_id, answer in enumerate(answer_table)}
+    encoded = encode_answers(['alpha', 'beta', 'free text'], answer_ids)
+    assert encoded == [1, 0, 'free text']
+    assert decode_answers(encoded, answer_table) == ['alpha', 'beta', 'free text']
+    # indices missing from the table are dropped
+    assert decode_answers([5, -1, 0], answer_table) == ['beta']
+
+
+def test_answer_table_is_append_only():
+    assert extend_answer_table(['beta', 'alpha'], ['alpha', 'gamma', '', 'gamma']) == ['beta', 'alpha', 'gamma']
+
+
+def test_answers_are_stored_as_indices():
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    call_handler(block, 'publish_answers', {'answers': ['alpha', 'beta gamma']})
+    assert block.answer_table == ['alpha']
+    assert block.user_answers == [0, 'beta gamma']
+    assert block.get_user_answers() == ['alpha', 'beta gamma']
+
+
+def test_text_answers_are_migrated_on_first_read():
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    # saved before the answer table existed
+    block.user_answers = ['alpha', 'beta']
+    assert block.get_user_answers() == ['alpha', 'beta']
+    assert block.user_answers == [0, 'beta']
+    assert block.get_user_answers() == ['alpha', 'beta']
+
+    block.user_answers = ['beta']
+    block.get_user_answers()
+    assert block.user_answers == ['beta']
+
+
+def test_blocks_with_the_same_content_keep_their_own_tables():
+    first, second = make_block(), make_block()
+    for block, answer_table in ((first, ['beta', 'alpha']), (second, ['gamma', 'alpha'])):
+        call_handler(block, 'update_editor_context', SETTINGS)
+        block.answer_table = answer_table
+    assert first.get_content_version() == second.get_content_version()
+
+    call_handler(first, 'publish_answers', {'answers': ['alpha']})
+    call_handler(second, 'publish_answers', {'answers': ['beta', 'alpha']})
+    assert second.user_answers == [1, 'beta']
+    assert second.get_user_answers() == ['alpha', 'beta']
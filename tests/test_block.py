@@ -0,0 +1,111 @@
+from benchmarks.runtime import FakeRuntime, FakeSettingsService, call_handler, make_block
+from text_highlighter.text_highlighter import RenderCache, published_definitions
+
+SETTINGS = {
+    'display_name': "Words",
+    'text': "<p>alpha beta gamma</p>",
+    'correct_answers': "alpha\ngamma",
+    'grading_type': 'partial_credit',
+    'max_attempts_number': 0,
+}
+
+TOKENIZED_SETTINGS = {
+    'display_name': "Tokens",
+    'text': "<p>A <token>alpha</token> and <token>beta</token>.</p>",
+    'correct_answers': "beta",
+    'grading_type': 'partial_credit',
+    'use_tokenized_system': True,
+}
+
+
+def test_token_index_of_changed_text_is_rebuilt():
+    block = make_block()
+    assert call_handler(block, 'update_editor_context', TOKENIZED_SETTINGS)['result'] == 'success'
+    # e.g. an OLX edit, the saved index refers to the previous text
+    block.text = "<p>A long intro here <token>beta</token>.</p>"
+
+    content = block.student_view().content
+    assert '<p>A long intro here <span class="th-cl-token" data-th-token-id="0">beta</span>.</p>' in content
+    response = call_handler(block, 'publish_answers', {'answers': ['beta'], 'token_ids': [0]})
+    assert response['user_correct_answers_num'] == 1
+
+
+def test_submission_events_are_verbose_by_default():
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    call_handler(block, 'publish_answers', {'answers': ['alpha']})
+
+    events = [(event_type, data) for event_type, data in block.runtime.events if event_type.startswith('xblock.')]
+    assert [event_type for event_type, _ in events] == ['xblock.text-highlighter.new_submission']
+    assert events[0][1]['text'] == SETTINGS['text']
+
+
+def test_compact_events_refer_to_a_definition_published_once():
+    published_definitions.clear()
+    runtime = FakeRuntime(services={'settings': FakeSettingsService({'text-highlighter': {'event_format': 'compact'}})})
+    block = make_block(runtime)
+    call_handler(block, 'update_editor_context', SETTINGS)
+    call_handler(block, 'publish_answers', {'answers': ['alpha']})
+    call_handler(block, 'reset_answers', {})
+
+    events = [(event_type, data) for event_type, data in runtime.events if event_type.startswith('xblock.')]
+    assert [event_type for event_type, _ in events] == [
+        'xblock.text-highlighter.block_definition',
+        'xblock.text-highlighter.new_submission',
+        'xblock.text-highlighter.reset_submission',
+    ]
+    definition = events[0][1]
+    assert definition['text'] == SETTINGS['text']
+    assert all(data['content_version'] == definition['content_version'] and 'text' not in data
+               for _, data in events[1:])
+
+
+def test_reset_publishes_the_grade_even_if_unchanged():
+    # the stored score may have been changed by a regrade since the submission
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    call_handler(block, 'publish_answers', {'answers': ['beta']})
+    call_handler(block, 'reset_answers', {})
+
+    grades = [data['value'] for event_type, data in block.runtime.events if event_type == 'grade']
+    assert grades == [0, 0]
+
+
+def test_request_cache_is_keyed_by_learner():
+    block = make_block()
+    user_service = block.runtime.service(block, 'user')
+    assert block.get_current_user() is block.get_current_user()
+    assert user_service.calls == 1
+
+    # e.g. `bind_for_student` in a grading task
+    block.scope_ids = block.scope_ids._replace(user_id='another learner')
+    block.get_current_user()
+    assert user_service.calls == 2
+
+
+def test_render_cache_is_bounded_by_size():
+    cache = RenderCache(max_size=1000)
+    first = cache.get_or_create('first', lambda: "x" * 400)
+    assert cache.get_or_create('first', lambda: "y") is first
+    cache.get_or_create('second', lambda: {'text': "x" * 400})
+    cache.get_or_create('third', lambda: ["x" * 400])
+    assert cache.size <= 1000
+    assert cache.stats()['entries'] == 2
+    assert cache.get_or_create('first', lambda: "y") == "y"
+
+    # a value larger than the limit is kept until the next one is added
+    cache.get_or_create('large', lambda: "x" * 5000)
+    assert cache.get_or_create('large', lambda: "y") == "x" * 5000
+
+
+def test_events_go_to_the_publish_sink():
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    published = []
+    block.publish_sink = lambda sink_block, event_type, data: published.append((sink_block, event_type))
+    call_handler(block, 'publish_answers', {'answers': ['alpha']})
+
+    assert published == [
+        (block, 'progress'), (block, 'grade'), (block, 'xblock.text-highlighter.new_submission'),
+    ]
+    assert not [event_type for event_type, _ in block.runtime.events if event_type == 'grade']
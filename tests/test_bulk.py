@@ -0,0 +1,103 @@
+import io
+import json
+
+from benchmarks.stores import MemoryFieldStore
+from text_highlighter.bulk import export_blocks, import_blocks
+from text_highlighter.text_highlighter import OTHER_ANSWERS_KEY
+
+BLOCK = {
+    'kind': 'block',
+    'id': 'block-1',
+    'display_name': "Words",
+    'text': "<p>alpha beta gamma</p>",
+    'correct_answers': ['alpha', 'gamma'],
+    'grading_type': 'partial_credit',
+    'max_attempts_number': 3,
+}
+
+
+def import_records(store, records):
+    lines = io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+    return import_blocks(store, lines, workers=0)
+
+
+def test_import_cleans_answers_and_rebuilds_statistics():
+    store = MemoryFieldStore()
+    summary = import_records(store, [
+        BLOCK,
+        {'kind': 'state', 'id': 'block-1', 'user': 'u1', 'answers': ['alpha', ' alpha ', 'free  text'],
+         'attempts': 1, 'state_version': 2},
+        {'kind': 'state', 'id': 'block-1', 'user': 'u2', 'answers': ['alpha', 'gamma'], 'attempts': 2},
+    ])
+    assert summary == {'blocks': 1, 'states': 2, 'errors': []}
+
+    answer_table = store.blocks['block-1']['answer_table']
+    state = store.user_states['block-1']['u1']
+    assert state['user_answers'] == [answer_table.index('alpha'), 'free text']
+    assert state['state_version'] == 2
+    assert state['statistics_contribution']['answers'] == sorted(['alpha', OTHER_ANSWERS_KEY])
+    assert store.answer_statistics['block-1'] == {
+        'learners': 2,
+        'answers': {'alpha': 2, 'gamma': 1, OTHER_ANSWERS_KEY: 1},
+        'tokens': {},
+        'scores': {'0.5': 1, '1.0': 1},
+    }
+
+
+def test_import_rejects_answers_that_are_not_a_list_of_texts():
+    store = MemoryFieldStore()
+    summary = import_records(store, [
+        BLOCK,
+        {'kind': 'state', 'id': 'block-1', 'user': 'u1', 'answers': 'alpha'},
+        {'kind': 'state', 'id': 'block-1', 'user': 'u2', 'answers': [1, 2]},
+    ])
+    assert summary['states'] == 0
+    assert [error['line'] for error in summary['errors']] == [2, 3]
+
+
+def test_export_import_round_trip():
+    source = MemoryFieldStore()
+    import_records(source, [
+        BLOCK,
+        {'kind': 'state', 'id': 'block-1', 'user': 'u1', 'answers': ['gamma'], 'attempts': 1, 'state_version': 1},
+    ])
+    exported = io.StringIO()
+    assert export_blocks(source, exported) == 2
+
+    destination = MemoryFieldStore()
+    exported.seek(0)
+    assert import_blocks(destination, exported, workers=0)['errors'] == []
+    assert destination.user_states == source.user_states
+    assert destination.answer_statistics == source.answer_statistics
+
+
+def test_import_reports_block_fields_of_the_wrong_type():
+    store = MemoryFieldStore()
+    summary = import_records(store, [
+        dict(BLOCK, id='text-answers', correct_answers="alpha"),
+        dict(BLOCK, id='number-answers', correct_answers=[1]),
+        dict(BLOCK, id='number-description', description=5),
+        dict(BLOCK, id='list-text', text=["<token>alpha</token>"], use_tokenized_system=True),
+        {'kind': 'state', 'id': 'list-text', 'user': 'u1', 'answers': ['alpha']},
+        BLOCK,
+    ])
+    assert summary['blocks'] == 1
+    assert summary['states'] == 0
+    assert [(error['line'], error['id'], error['message']) for error in summary['errors']] == [
+        (1, 'text-answers', 'Invalid correct_answers'),
+        (2, 'number-answers', 'Invalid correct_answers'),
+        (3, 'number-description', 'Invalid description'),
+        (4, 'list-text', 'Invalid text'),
+    ]
+    assert list(store.blocks) == ['block-1']
+
+
+def test_import_reports_invalid_blocks_validated_in_the_pool():
+    store = MemoryFieldStore()
+    lines = io.StringIO("".join(json.dumps(record) + "\n" for record in [
+        dict(BLOCK, id='number-answers', correct_answers=[1]),
+        BLOCK,
+    ]))
+    summary = import_blocks(store, lines, workers=2)
+    assert summary['blocks'] == 1
+    assert [error['id'] for error in summary['errors']] == ['number-answers']
@@ -0,0 +1,123 @@
+import re
+
+from benchmarks.runtime import call_handler, make_block
+from text_highlighter.chunks import build_text_chunks, iter_chunk_boundaries, render_chunk_containers, split_text
+from text_highlighter.text_highlighter import INITIAL_TEXT_CHUNKS, LARGE_TEXT_THRESHOLD, TEXT_CHUNKS_PAGE_SIZE
+from text_highlighter.tokens import find_tokens
+
+RE_TOKEN_ID = re.compile(r'data-th-token-id="(\d+)"')
+
+
+def test_boundaries_are_top_level_block_elements():
+    text = "<p>one<br/>two</p><div><p>nested</p></div><hr/><ul><li>item</li></ul>"
+    assert list(iter_chunk_boundaries(text)) == [
+        text.index('<div>'), text.index('<hr/>'), text.index('<ul>'),
+    ]
+
+
+def test_comments_scripts_and_styles_are_skipped():
+    text = ("<p>one</p><!-- <div> <p> --><p>two</p><script>var a = '<p>';</script>"
+            "<style>p:before { content: '<div>'; }</style><![CDATA[<p>]]><p>three</p>")
+    assert list(iter_chunk_boundaries(text)) == [
+        text.index('<p>two'),
+        text.index('<p>three'),
+    ]
+    chunks = split_text(text, chunk_size=1)
+    assert [text[start:end] for start, end, _ in chunks] == [
+        "<p>one</p><!-- <div> <p> -->",
+        "<p>two</p><script>var a = '<p>';</script><style>p:before { content: '<div>'; }</style><![CDATA[<p>]]>",
+        "<p>three</p>",
+    ]
+
+
+def test_chunks_have_at_least_the_chunk_size():
+    paragraphs = ["<p>%s</p>" % ("x" * 8) for _ in range(10)]
+    text = "".join(paragraphs)
+    chunks = split_text(text, chunk_size=30)
+    assert [[start, end] for start, end, _ in chunks] == [[0, 30], [30, 60], [60, 90], [90, 120], [120, 150]]
+    assert "".join(text[start:end] for start, end, _ in chunks) == text
+
+
+def test_first_token_ids():
+    text = "<p><token>a</token> <token>b</token></p><p>none</p><p><token>c</token></p>"
+    chunks = split_text(text, find_tokens(text), chunk_size=1)
+    assert [token_id for _, _, token_id in chunks] == [0, 2, 2]
+
+
+def test_short_texts_are_not_chunked():
+    assert build_text_chunks("<p>short</p><p>text</p>", 'hash', chunk_size=1) == {}
+    assert build_text_chunks("x" * 100, 'hash', threshold=10, chunk_size=1) == {}
+    assert build_text_chunks("<p>a</p><p>b</p>", 'hash', threshold=1, chunk_size=1) == {
+        'text_hash': 'hash',
+        'chunks': [[0, 8, 0], [8, 16, 0]],
+    }
+
+
+def test_chunk_containers():
+    assert render_chunk_containers(["<p>a</p>", None]) == (
+        '<div class="th-text-chunk" data-th-chunk="0"><p>a</p></div>'
+        '<div class="th-text-chunk" data-th-chunk="1" data-th-chunk-pending="true"></div>'
+    )
+
+
+def make_large_block(tokenized):
+    paragraph = "<p>" + "filler " * 1400 + "%s</p>"
+    word = "<token>alpha</token> <token>beta</token>" if tokenized else "alpha beta"
+    text = "".join(paragraph % word for _ in range(LARGE_TEXT_THRESHOLD // 5000))
+    block = make_block()
+    response = call_handler(block, 'update_editor_context', {
+        'display_name': "Large",
+        'text': text,
+        'correct_answers': "alpha",
+        'grading_type': 'partial_credit',
+        'use_tokenized_system': tokenized,
+    })
+    assert response['result'] == 'success'
+    return block
+
+
+def load_all_chunks(block, total):
+    chunks = []
+    for start in range(0, total, TEXT_CHUNKS_PAGE_SIZE):
+        response = call_handler(block, 'load_text_chunks', {'start': start, 'count': TEXT_CHUNKS_PAGE_SIZE})
+        assert response['result'] == 'success'
+        assert response['total'] == total
+        chunks.extend(response['chunks'])
+    return chunks
+
+
+def test_token_ids_are_stable_across_chunks():
+    block = make_large_block(tokenized=True)
+    total = len(block.text_chunks['chunks'])
+    assert total > TEXT_CHUNKS_PAGE_SIZE
+
+    content = block.student_view().content
+    assert content.count('data-th-chunk-pending="true"') == total - INITIAL_TEXT_CHUNKS
+    chunks = load_all_chunks(block, total)
+    assert [chunk['index'] for chunk in chunks] == list(range(total))
+
+    token_ids = [int(token_id) for chunk in chunks for token_id in RE_TOKEN_ID.findall(chunk['html'])]
+    assert token_ids == list(range(len(block.token_index['tokens'])))
+    assert "".join(chunk['html'] for chunk in chunks).count('th-cl-token') == len(token_ids)
+
+
+def test_loaded_chunks_are_highlighted():
+    block = make_large_block(tokenized=False)
+    total = len(block.text_chunks['chunks'])
+    call_handler(block, 'publish_answers', {'answers': ['beta']})
+
+    chunks = load_all_chunks(block, total)
+    assert all('<span class="th-no-select th-0">beta</span>' in chunk['html'] for chunk in chunks)
+
+
+def test_invalid_chunk_ranges():
+    block = make_large_block(tokenized=False)
+    for data in ({'start': -1}, {'count': 0}, {'start': 'x'}):
+        assert call_handler(block, 'load_text_chunks', data) == {
+            'result': 'error', 'message': "Invalid chunks range"
+        }
+    response = call_handler(block, 'load_text_chunks', {'start': 0, 'count': 100})
+    assert len(response['chunks']) == TEXT_CHUNKS_PAGE_SIZE
+
+    small = make_block()
+    assert call_handler(small, 'load_text_chunks', {})['message'] == "The text is not chunked"
@@ -0,0 +1,72 @@
+from benchmarks.runtime import call_handler, make_block
+
+SETTINGS = {
+    'display_name': "Words",
+    'text': "<p>alpha beta gamma</p>",
+    'correct_answers': "alpha\ngamma",
+    'grading_type': 'partial_credit',
+    'max_attempts_number': 0,
+}
+
+
+def make_configured_block():
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    return block
+
+
+def test_draft_is_saved_encoded():
+    block = make_configured_block()
+    assert call_handler(block, 'save_draft', {'answers': ['gamma', ' beta ', 'alpha', 'gamma']}) == {
+        'result': 'success'
+    }
+    assert block.draft_answers == [0, 'beta', 1]
+
+
+def test_invalid_drafts_are_rejected():
+    block = make_configured_block()
+    for data in ({}, {'answers': 'alpha'}, {'answers': [1]}, {'answers': ['alpha', None]}):
+        assert call_handler(block, 'save_draft', data) == {'result': 'error', 'message': "Invalid answers format"}
+    assert block.draft_answers == []
+
+
+def test_draft_is_rejected_after_submission():
+    block = make_configured_block()
+    call_handler(block, 'publish_answers', {'answers': ['alpha']})
+    response = call_handler(block, 'save_draft', {'answers': ['gamma']})
+    assert response == {'result': 'error', 'message': "Answers are already submitted"}
+
+
+def test_draft_is_restored_in_the_student_view():
+    block = make_configured_block()
+    call_handler(block, 'save_draft', {'answers': ['gamma', 'alpha']})
+
+    content = block.student_view().content
+    assert 'data-draft-texts="[&quot;alpha&quot;, &quot;gamma&quot;]"' in content
+    assert '<span class="th-no-select th-0">alpha</span> beta <span class="th-no-select th-1">gamma</span>' in content
+    # Studio shows the text as is
+    assert 'th-no-select' not in block.student_view({'studio_view': True}).content
+
+
+def test_submission_clears_the_draft():
+    block = make_configured_block()
+    call_handler(block, 'save_draft', {'answers': ['gamma']})
+    call_handler(block, 'publish_answers', {'answers': ['alpha']})
+    assert block.draft_answers == []
+    assert 'data-draft-texts=""' in block.student_view().content
+
+
+def test_retried_submission_returns_the_saved_answers():
+    block = make_configured_block()
+    first = call_handler(block, 'publish_answers', {'answers': ['alpha'], 'submission_id': 's1'})
+    retry = call_handler(block, 'publish_answers', {'answers': ['alpha', 'gamma'], 'submission_id': 's1'})
+
+    assert retry == first
+    assert retry['selected_texts'] == "alpha"
+    assert block.attempts == 1
+    submissions = [event_type for event_type, _ in block.runtime.events
+                   if event_type == 'xblock.text-highlighter.new_submission']
+    assert len(submissions) == 1
+
+    other = call_handler(block, 'publish_answers', {'answers': ['gamma'], 'submission_id': 's2'})
+    assert other == {'result': 'error', 'message': "Answers are already submitted"}
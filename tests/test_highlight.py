@@ -0,0 +1,36 @@
+from text_highlighter.highlight import AhoCorasick, highlight_html
+
+
+def test_all_occurrences_are_found():
+    matcher = AhoCorasick(['he', 'she', 'his', 'hers'])
+    assert sorted(matcher.iter_matches("ushers")) == [(4, 0), (4, 1), (6, 3)]
+
+
+def test_leftmost_longest_non_overlapping_matches():
+    matcher = AhoCorasick(['tax', 'tax policy', 'policy', 'cy ma', ''])
+    assert matcher.find_non_overlapping("a tax policy market") == [(2, 12, 1)]
+    assert matcher.find_non_overlapping("policy market tax") == [(0, 6, 2), (14, 17, 0)]
+    # the earlier match wins over a longer one starting later
+    assert AhoCorasick(['ab', 'bcd']).find_non_overlapping("abcd") == [(0, 2, 0)]
+
+
+def test_highlight_classes_are_the_answer_indexes():
+    html = highlight_html("<p>alpha beta alpha</p>", ['beta', 'alpha'])
+    assert html == (
+        '<p><span class="th-no-select th-1">alpha</span> <span class="th-no-select th-0">beta</span> '
+        '<span class="th-no-select th-1">alpha</span></p>'
+    )
+
+
+def test_markup_is_not_highlighted():
+    html = '<p class="beta" title="alpha beta"><a href="/beta">beta</a> al<b>pha</b></p>'
+    assert highlight_html(html, ['beta', 'alpha']) == (
+        '<p class="beta" title="alpha beta"><a href="/beta"><span class="th-no-select th-0">beta</span></a> '
+        'al<b>pha</b></p>'
+    )
+
+
+def test_no_answers_leave_the_html_unchanged():
+    html = "<p>alpha</p>"
+    assert highlight_html(html, []) is html
+    assert highlight_html(html, ['']) is html
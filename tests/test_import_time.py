@@ -0,0 +1,8 @@
+from benchmarks.bench_import import DEFAULT_MAX_MS, measure_import
+
+
+def test_import_defers_rendering_and_grading_modules():
+    imported, cumulative_ms = measure_import()
+    assert imported == []
+    assert cumulative_ms is not None
+    assert cumulative_ms <= DEFAULT_MAX_MS
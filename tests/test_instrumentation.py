@@ -0,0 +1,13 @@
+from text_highlighter.instrumentation import HistogramExporter, get_exporter
+
+
+def test_invalid_exporter_settings_disable_timing():
+    assert get_exporter({'exporter': 'statsd', 'port': 'not a port'}) is None
+    assert get_exporter({'exporter': 'histogram', 'buckets': 5}) is None
+    assert get_exporter({'exporter': 'unknown'}) is None
+
+
+def test_exporter_is_created_once_per_settings():
+    exporter = get_exporter({'exporter': 'histogram', 'buckets': [1, 10]})
+    assert isinstance(exporter, HistogramExporter)
+    assert get_exporter({'buckets': [1, 10], 'exporter': 'histogram'}) is exporter
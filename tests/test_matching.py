@@ -0,0 +1,106 @@
+import pytest
+
+from text_highlighter.matching import MAX_FUZZY_LENGTH, AnswerMatcher, edit_distance
+from text_highlighter.text_highlighter import AnswerKeyCache, AnswersStat
+
+CORRECT_ANSWERS = ['fiscal policy', 'inflation', 'tax']
+
+
+def matched(answer, **options):
+    answer_id = AnswerMatcher(CORRECT_ANSWERS, options).match(answer)
+    return None if answer_id is None else CORRECT_ANSWERS[answer_id]
+
+
+def test_exact_by_default():
+    assert matched('inflation') == 'inflation'
+    assert matched('Inflation') is None
+    assert matched('inflation.') is None
+
+
+def test_ignore_case():
+    assert matched('Fiscal POLICY', ignore_case=True) == 'fiscal policy'
+    assert matched('Inflation', trim_punctuation=True) is None
+
+
+def test_trim_punctuation():
+    assert matched('"inflation."', trim_punctuation=True) == 'inflation'
+    assert matched('  tax,', trim_punctuation=True) == 'tax'
+    assert matched('infla-tion', trim_punctuation=True) is None
+
+
+def test_normalize_unicode():
+    assert matched('ﬁscal policy', normalize_unicode=True) == 'fiscal policy'
+    assert matched('fiscal policy', normalize_unicode=True) == 'fiscal policy'
+    assert AnswerMatcher(["don't"], {'normalize_unicode': True}).match('don’t') == 0
+    assert matched('ﬁscal policy') is None
+
+
+@pytest.mark.parametrize('answer, expected', [
+    ('inflasion', 'inflation'),
+    ('inflaton', 'inflation'),
+    ('infflation', 'inflation'),
+    ('fiscal polcy', 'fiscal policy'),
+    ('inflasiom', None),
+    ('tac', None),
+])
+def test_one_edit(answer, expected):
+    assert matched(answer, max_edits=1) == expected
+
+
+@pytest.mark.parametrize('answer, expected', [
+    ('inflasiom', 'inflation'),
+    ('inlfation', 'inflation'),
+    ('fiscl polcy', 'fiscal policy'),
+    ('ixflasiom', None),
+])
+def test_two_edits(answer, expected):
+    assert matched(answer, max_edits=2) == expected
+
+
+def test_long_answers_are_matched_without_the_deletions_index():
+    long_answer = 'the central bank raised the interest rates ' * 5
+    matcher = AnswerMatcher([long_answer, 'inflation'], {'max_edits': 2})
+    assert len(long_answer) > MAX_FUZZY_LENGTH
+    assert all(len(variant) <= MAX_FUZZY_LENGTH for variant in matcher.deletions_index)
+    two_typos = long_answer.replace('bank', 'bnk', 1).replace('raised', 'raisd', 1)
+    assert matcher.match(two_typos) == 0
+    assert matcher.match(two_typos.replace('rates', 'rats', 1)) is None
+
+
+def test_closest_answer_wins():
+    matcher = AnswerMatcher(['policies', 'police'], {'max_edits': 2})
+    assert matcher.match('polices') in (0, 1)
+    assert matcher.match('policie') == 0
+
+
+@pytest.mark.parametrize('first, second, distance', [
+    ('kitten', 'sitting', 3),
+    ('flaw', 'lawn', 2),
+    ('abc', 'abc', 0),
+    ('', 'ab', 2),
+])
+def test_edit_distance(first, second, distance):
+    assert edit_distance(first, second, 5) == distance
+    assert edit_distance(first, second, 1) == min(distance, 2)
+
+
+def test_correct_answer_is_counted_once():
+    matching = {'ignore_case': True, 'trim_punctuation': True, 'max_edits': 1}
+    ans_stat = AnswersStat(CORRECT_ANSWERS, ['Inflation', 'inflation.', 'inflaton'], 1, 'plus_minus', matching)
+    assert ans_stat.user_correct_answers_num == 1
+    # the two other selections count as incorrect
+    assert ans_stat.percent_completion == 0
+
+    ans_stat = AnswersStat(CORRECT_ANSWERS, ['Inflation', 'TAX', 'fiscal policy!'], 1, 'all_or_nothing', matching)
+    assert ans_stat.percent_completion == 1
+
+
+def test_answer_key_cache_is_bounded_by_size():
+    cache = AnswerKeyCache(max_size=5000)
+    matching_json = '{"max_edits": 2}'
+    first = cache.get_or_create(('inflation', 'recession'), matching_json)
+    assert cache.get_or_create(('inflation', 'recession'), matching_json) is first
+    for answer_num in range(10):
+        cache.get_or_create((f'answer number {answer_num}',), matching_json)
+    assert cache.size <= 5000
+    assert cache.get_or_create(('inflation', 'recession'), matching_json) is not first
@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks.legacy import LegacyAnswersStat
+from text_highlighter.text_highlighter import AnswersStat, get_answer_key
+
+GRADING_TYPES = ['all_or_nothing', 'partial_credit', 'plus_minus']
+WEIGHTS = [None, 0, 0.5, 1, 2.5]
+CORRECT_ANSWERS = ['beta', 'delta', 'gamma']
+RESPONSES = [
+    [],
+    ['beta'],
+    ['beta', 'delta', 'gamma'],
+    ['alpha', 'beta', 'delta', 'gamma'],
+    ['alpha', 'epsilon'],
+    ['beta', 'beta', 'delta'],
+    ['beta', 'delta', 'gamma', 'gamma'],
+    ['Beta', 'delta '],
+]
+
+
+@pytest.mark.parametrize('grading_type', GRADING_TYPES)
+@pytest.mark.parametrize('weight', WEIGHTS)
+@pytest.mark.parametrize('resp_answers', RESPONSES)
+def test_answers_stat_matches_legacy_scan(grading_type, weight, resp_answers):
+    expected = LegacyAnswersStat(CORRECT_ANSWERS, resp_answers, weight, grading_type).to_dict()
+    assert AnswersStat(CORRECT_ANSWERS, resp_answers, weight, grading_type).to_dict() == expected
+
+
+@pytest.mark.parametrize('grading_type', GRADING_TYPES)
+@pytest.mark.parametrize('weight', WEIGHTS)
+def test_batch_matches_legacy_scan(grading_type, weight):
+    expected = [LegacyAnswersStat(CORRECT_ANSWERS, resp_answers, weight, grading_type).to_dict()
+                for resp_answers in RESPONSES]
+    stats = AnswersStat.batch(CORRECT_ANSWERS, RESPONSES, weight, grading_type)
+    assert [stat.to_dict() for stat in stats] == expected
+
+
+@pytest.mark.parametrize('grading_type', GRADING_TYPES)
+def test_no_correct_answers(grading_type):
+    for resp_answers in RESPONSES:
+        expected = LegacyAnswersStat([], resp_answers, 1, grading_type).to_dict()
+        assert AnswersStat([], resp_answers, 1, grading_type).to_dict() == expected
+
+
+def test_answer_key_is_shared():
+    assert get_answer_key(CORRECT_ANSWERS) is get_answer_key(list(CORRECT_ANSWERS))
+    answer_key = get_answer_key(CORRECT_ANSWERS)
+    assert get_answer_key(answer_key) is answer_key
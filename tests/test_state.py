@@ -0,0 +1,113 @@
+import pytest
+
+from benchmarks.runtime import call_handler, make_block
+from text_highlighter.state import CAS_ATTEMPTS, FieldDataStateStore, StateConflict, update_state
+
+
+class RacingStore(FieldDataStateStore):
+    """
+    Lets a parallel request change the state between the first `races` loads and their compare-and-set.
+    """
+
+    def __init__(self, races):
+        self.races = races
+
+    def compare_and_set(self, block, expected_version, fields):
+        if self.races:
+            self.races -= 1
+            block.state_version += 1
+        return super().compare_and_set(block, expected_version, fields)
+
+
+def test_update_is_retried_on_conflicts():
+    block = make_block()
+    calls = []
+
+    def submit(state):
+        calls.append(state['attempts'])
+        return {'attempts': state['attempts'] + 1}, 'saved'
+
+    assert update_state(RacingStore(races=2), block, submit) == 'saved'
+    assert len(calls) == 3
+    assert block.attempts == 1
+    assert block.state_version == 3
+
+
+def test_update_gives_up_after_repeated_conflicts():
+    block = make_block()
+    with pytest.raises(StateConflict):
+        update_state(RacingStore(races=CAS_ATTEMPTS), block, lambda state: ({'attempts': 1}, None))
+    assert block.attempts == 0
+
+
+SETTINGS = {
+    'display_name': "Words",
+    'text': "<p>alpha beta gamma</p>",
+    'correct_answers': "alpha\ngamma",
+    'grading_type': 'partial_credit',
+    'max_attempts_number': 2,
+}
+
+
+def make_configured_block():
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    return block
+
+
+def submissions(block):
+    return [event_type for event_type, _ in block.runtime.events
+            if event_type == 'xblock.text-highlighter.new_submission']
+
+
+def test_submission_is_rejected_if_answers_are_submitted():
+    block = make_configured_block()
+    assert call_handler(block, 'publish_answers', {'answers': ['alpha']})['result'] == 'success'
+    response = call_handler(block, 'publish_answers', {'answers': ['gamma']})
+    assert response == {'result': 'error', 'message': "Answers are already submitted"}
+    assert block.get_user_answers() == ['alpha']
+    assert block.attempts == 1
+    assert len(submissions(block)) == 1
+
+
+def test_submission_is_rejected_without_attempts_left():
+    block = make_configured_block()
+    for answer in ('beta', 'alpha'):
+        call_handler(block, 'publish_answers', {'answers': [answer]})
+        if block.attempts < 2:
+            assert 'grade_text' in call_handler(block, 'reset_answers', {})
+    assert block.attempts == 2
+
+    # the last answers are kept, they can't be submitted again
+    response = call_handler(block, 'reset_answers', {})
+    assert response == {'result': 'error', 'message': "No attempts left"}
+    assert block.get_user_answers() == ['alpha']
+
+    block.user_answers = []
+    response = call_handler(block, 'publish_answers', {'answers': ['gamma']})
+    assert response == {'result': 'error', 'message': "No attempts left"}
+    assert len(submissions(block)) == 2
+
+
+def test_reset_of_answers_saved_without_attempts():
+    block = make_configured_block()
+    block.max_attempts_number = 1
+    # saved before attempts were counted
+    block.user_answers = ['alpha']
+    response = call_handler(block, 'reset_answers', {})
+    assert response == {'result': 'error', 'message': "No attempts left"}
+    assert block.get_user_answers() == ['alpha']
+
+
+def test_submission_id_is_cleared_on_reset():
+    block = make_configured_block()
+    call_handler(block, 'publish_answers', {'answers': ['alpha'], 'submission_id': 's1'})
+    call_handler(block, 'reset_answers', {})
+    assert block.last_submission_id is None
+
+    response = call_handler(block, 'publish_answers', {'answers': ['gamma'], 'submission_id': 's1'})
+    assert response['result'] == 'success'
+    assert response['selected_texts'] == "gamma"
+    assert block.get_user_answers() == ['gamma']
+    assert block.attempts == 2
+    assert len(submissions(block)) == 2
@@ -0,0 +1,46 @@
+from benchmarks.runtime import FakeRuntime, FakeUserStateService, call_handler, make_block
+from text_highlighter.regrade import recompute_statistics
+from text_highlighter.text_highlighter import OTHER_ANSWERS_KEY
+
+SETTINGS = {
+    'display_name': "Words",
+    'text': "<p>alpha beta gamma</p>",
+    'correct_answers': "alpha\ngamma",
+    'grading_type': 'partial_credit',
+    'max_attempts_number': 0,
+}
+
+
+def submit_as(block, user_id, answers):
+    block.scope_ids = block.scope_ids._replace(user_id=user_id)
+    block.user_answers = None
+    block.attempts = 0
+    block.statistics_contribution = {}
+    block.state_version = 0
+    call_handler(block, 'publish_answers', {'answers': answers})
+    return {name: getattr(block, name) for name in ('user_answers', 'statistics_contribution')}
+
+
+def test_free_text_answers_share_one_bucket():
+    block = make_block()
+    call_handler(block, 'update_editor_context', SETTINGS)
+    for learner_num in range(50):
+        submit_as(block, f"user{learner_num}", ['alpha', f"free text {learner_num}"])
+
+    statistics = block.answer_statistics
+    assert statistics['learners'] == 50
+    assert statistics['answers'] == {'alpha': 50, OTHER_ANSWERS_KEY: 50}
+
+
+def test_recompute_matches_incremental_statistics():
+    user_state_service = FakeUserStateService()
+    states = user_state_service.states
+    block = make_block(FakeRuntime(services={'user_state': user_state_service}))
+    call_handler(block, 'update_editor_context', SETTINGS)
+    for learner_num, answers in enumerate([['alpha'], ['alpha', 'gamma'], ['beta', 'other'], ['gamma']]):
+        states[f"user{learner_num}"] = submit_as(block, f"user{learner_num}", answers)
+    expected = block.answer_statistics
+
+    block.answer_statistics = {'learners': 1, 'answers': {'alpha': 7}}
+    assert recompute_statistics(block, list(states)) == expected
+    assert block.answer_statistics == expected
@@ -0,0 +1,69 @@
+from text_highlighter.tokens import (
+    CLOSE_END, CONTENT_END, CONTENT_START, OPEN_START, TOKEN_TEXT, build_token_index, find_tokens,
+    render_tokenized_text
+)
+
+
+def check_offsets(text, tokens):
+    for token in tokens:
+        assert text[token[OPEN_START]:token[CONTENT_START]].lower().startswith('<token')
+        assert text[token[CONTENT_END]:token[CLOSE_END]].lower() == '</token>'
+
+
+def test_offsets_and_normalized_text():
+    text = "<p>A <token>first</token> and <token> second\n  one </token>.</p>"
+    tokens = find_tokens(text)
+    assert tokens == [
+        [5, 12, 17, 25, 'first'],
+        [30, 37, 51, 59, 'second one'],
+    ]
+    check_offsets(text, tokens)
+
+
+def test_offsets_after_crlf_line_breaks():
+    text = "<p>Line one\r\n<token>alpha</token>\r\nline\r\n three <token>beta</token></p>"
+    tokens = find_tokens(text)
+    assert [token[TOKEN_TEXT] for token in tokens] == ['alpha', 'beta']
+    assert [text[token[CONTENT_START]:token[CONTENT_END]] for token in tokens] == ['alpha', 'beta']
+    check_offsets(text, tokens)
+
+
+def test_uppercase_and_attributes():
+    text = "<P>A <TOKEN>alpha</TOKEN> and <Token class=\"x\">beta</tOkEn>.</P>"
+    tokens = find_tokens(text)
+    assert [token[TOKEN_TEXT] for token in tokens] == ['alpha', 'beta']
+    assert [text[token[CONTENT_START]:token[CONTENT_END]] for token in tokens] == ['alpha', 'beta']
+    check_offsets(text, tokens)
+
+
+def test_nested_markup_contributes_its_text():
+    text = "<p><token>fiscal <b>policy</b> &amp; <i>tax</i></token> <token><token>inner</token> outer</token></p>"
+    tokens = find_tokens(text)
+    assert [token[TOKEN_TEXT] for token in tokens] == ['fiscal policy & tax', 'inner outer']
+    # the nested token is part of the top-level one
+    assert text[tokens[1][CONTENT_START]:tokens[1][CONTENT_END]] == "<token>inner</token> outer"
+    check_offsets(text, tokens)
+
+
+def test_render_round_trips():
+    text = "<p>A\r\n<TOKEN>alpha</TOKEN> and <token>fiscal <b>policy</b></token>.</p>\n<p>End <token>beta</token></p>"
+    token_index = build_token_index(text, ['beta'], 'hash')
+    rendered = render_tokenized_text(text, token_index)
+    assert rendered == (
+        '<p>A\r\n<span class="th-cl-token" data-th-token-id="0">alpha</span> and '
+        '<span class="th-cl-token" data-th-token-id="1">fiscal <b>policy</b></span>.</p>\n'
+        '<p>End <span class="th-cl-token" data-th-token-id="2">beta</span></p>'
+    )
+    assert token_index['answers'] == {'beta': 2}
+
+    # rendering parts of the text keeps the token ids of the whole text
+    middle = text.index('</p>') + len('</p>')
+    assert render_tokenized_text(text, token_index, 0, middle) + \
+        render_tokenized_text(text, token_index, middle, None, 2) == rendered
+
+
+def test_comments_and_unclosed_tokens_are_ignored():
+    text = "<p><!-- <token>old</token> --><token>alpha</token> <token>unclosed</p>"
+    tokens = find_tokens(text)
+    assert [token[TOKEN_TEXT] for token in tokens] == ['alpha']
+    check_offsets(text, tokens)
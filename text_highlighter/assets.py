@@ -0,0 +1,93 @@
+"""
+Minified, content-hashed bundles of the block static assets.
+
+The bundles and their manifest are generated into `public/dist` of the built package by the `build_py` step of
+`setup.py`, or into the source tree for a development checkout:
+
+    python text_highlighter/assets.py
+
+This module must not import anything from the package, `setup.py` runs it by path.
+"""
+import functools
+import hashlib
+import json
+import os
+import re
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS = [
+    'public/js/th_public.js',
+    'public/js/th_staff.js',
+    'public/css/th_block.css',
+]
+DIST_DIR = 'public/dist'
+MANIFEST_PATH = DIST_DIR + '/manifest.json'
+
+RE_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+RE_CSS_WHITESPACE = re.compile(r"\s+")
+RE_CSS_PUNCTUATION = re.compile(r"\s*([{};])\s*")
+
+
+def minify_js(source):
+    """
+    Conservative minification: drops comment-only lines, indentation and blank lines.
+    """
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def minify_css(source):
+    source = RE_CSS_COMMENT.sub("", source)
+    source = RE_CSS_WHITESPACE.sub(" ", source)
+    return RE_CSS_PUNCTUATION.sub(r"\1", source).strip() + "\n"
+
+
+def build(package_dir=PACKAGE_DIR):
+    """
+    Writes the bundles and the manifest mapping source paths to bundle paths, returns the manifest.
+    """
+    dist_dir = os.path.join(package_dir, DIST_DIR)
+    os.makedirs(dist_dir, exist_ok=True)
+    for fname in os.listdir(dist_dir):
+        os.remove(os.path.join(dist_dir, fname))
+
+    manifest = {}
+    for path in ASSETS:
+        with open(os.path.join(package_dir, path), encoding='utf-8') as f:
+            source = f.read()
+        name, ext = os.path.splitext(os.path.basename(path))
+        minified = minify_css(source) if ext == '.css' else minify_js(source)
+        digest = hashlib.sha256(minified.encode('utf-8')).hexdigest()[:12]
+        bundle_path = f"{DIST_DIR}/{name}.{digest}.min{ext}"
+        with open(os.path.join(package_dir, bundle_path), 'w', encoding='utf-8') as f:
+            f.write(minified)
+        manifest[path] = bundle_path
+
+    with open(os.path.join(package_dir, MANIFEST_PATH), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+@functools.lru_cache(maxsize=None)
+def load_manifest(package_dir=PACKAGE_DIR):
+    try:
+        with open(os.path.join(package_dir, MANIFEST_PATH), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_path(path):
+    """
+    Returns the bundle path of a static asset, or the source path when bundles were not built (e.g. in development).
+    """
+    return load_manifest().get(path, path)
+
+
+if __name__ == '__main__':
+    for source_path, bundle_path in sorted(build().items()):
+        print(f"{source_path} -> {bundle_path}")
@@ -0,0 +1,297 @@
+"""
+Bulk export and import of Text Highlighter blocks and their learner state as JSON lines.
+
+Usage:
+
+    exported = export_blocks(store, out_file)
+    summary = import_blocks(store, in_file, workers=4)
+
+Every line holds one record, a block is followed by the state of its learners:
+
+    {"kind":"block","id":"<usage id>","display_name":...,"text":...,"correct_answers":[...],"grading_type":...,...}
+    {"kind":"state","id":"<usage id>","user":"<user id>","answers":["answer", ...],"attempts":1,"state_version":2}
+
+Learner answers are exported as texts, they are cleaned like submitted answers and encoded against the answer
+table of the destination block on import. Both directions read and write one chunk of lines at a time, memory
+does not grow with the number of blocks or learners. Imported blocks go through the same validation as
+`update_editor_context` in a process pool.
+
+The answer statistics of an imported block are rebuilt from the learner states imported after it, as they are
+exported. States imported without their block get their statistics contribution but the block statistics are
+left as they are, run `regrade.recompute_statistics` for those blocks afterwards.
+
+The blocks are read and written through a field store, see `FieldStore` for the interface to implement on top
+of the storage used by the runtime.
+"""
+from __future__ import absolute_import
+
+import json
+import os
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+
+from .regrade import iter_batches
+from .text_highlighter import (
+    AnswersStat, apply_statistics_delta, build_settings_fields, decode_answers, encode_answers, find_token_ids,
+    get_answer_key, prepare_answers_list, statistics_contribution, validate_editor_data
+)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+BLOCK_FIELDS = (
+    'display_name', 'description', 'text', 'use_tokenized_system', 'correct_answers',
+    'non_limited_number_of_answers', 'grading_type', 'weight', 'display_correct_answers_after_response',
+    'max_attempts_number', 'answer_matching',
+)
+
+
+class FieldStore:
+    """
+    Storage of the block settings and the learner states, keyed by usage id.
+
+    Settings are dicts of the `Scope.settings` fields, states dicts of the `Scope.user_state` fields.
+    """
+
+    def iter_blocks(self) -> t.Iterator[t.Tuple[str, t.Dict[str, t.Any]]]:
+        raise NotImplementedError
+
+    def get_block(self, usage_id: str) -> t.Optional[t.Dict[str, t.Any]]:
+        raise NotImplementedError
+
+    def save_block(self, usage_id: str, fields: t.Dict[str, t.Any]):
+        raise NotImplementedError
+
+    def iter_user_states(self, usage_id: str) -> t.Iterator[t.Tuple[str, t.Dict[str, t.Any]]]:
+        raise NotImplementedError
+
+    def save_user_states(self, usage_id: str, states: t.List[t.Tuple[str, t.Dict[str, t.Any]]]):
+        """
+        Updates the given fields of the learners' states, other fields are left as they are.
+        """
+        raise NotImplementedError
+
+    def save_answer_statistics(self, usage_id: str, statistics: t.Dict[str, t.Any]):
+        """
+        Replaces the `answer_statistics` (`Scope.user_state_summary`) of the block.
+        """
+        raise NotImplementedError
+
+
+def _dumps(record):
+    return json.dumps(record, separators=(',', ':'), ensure_ascii=False)
+
+
+def iter_export_records(store: FieldStore) -> t.Iterator[t.Dict[str, t.Any]]:
+    for usage_id, settings in store.iter_blocks():
+        record = {'kind': 'block', 'id': usage_id}
+        record.update((name, settings[name]) for name in BLOCK_FIELDS if name in settings)
+        yield record
+        answer_table = settings.get('answer_table') or []
+        for user_id, state in store.iter_user_states(usage_id):
+            yield {
+                'kind': 'state',
+                'id': usage_id,
+                'user': user_id,
+                'answers': decode_answers(state.get('user_answers') or [], answer_table),
+                'attempts': state.get('attempts', 0),
+                'state_version': state.get('state_version', 0),
+            }
+
+
+def export_blocks(store: FieldStore, out_file: t.TextIO, chunk_size=DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Writes all blocks of the store with their learner states, returns the number of records written.
+    """
+    written = 0
+    for chunk in iter_batches(iter_export_records(store), chunk_size):
+        out_file.write("".join(_dumps(record) + "\n" for record in chunk))
+        written += len(chunk)
+    return written
+
+
+TEXT_FIELDS = ('display_name', 'description', 'text', 'grading_type')
+
+
+def _check_field_types(record):
+    """
+    Returns the error message of the first field of a block record with an unexpected type, or None.
+    """
+    for name in TEXT_FIELDS:
+        if record.get(name) is not None and not isinstance(record[name], str):
+            return 'Invalid %s' % name
+    correct_answers = record.get('correct_answers')
+    if correct_answers is not None and (
+            not isinstance(correct_answers, list) or not all(isinstance(answer, str) for answer in correct_answers)):
+        return 'Invalid correct_answers'
+    return None
+
+
+def _editor_data(record):
+    data = dict(record)
+    data['correct_answers'] = "\n".join(record.get('correct_answers') or [])
+    data['problem_weight'] = record.get('weight')
+    return data
+
+
+def validate_block_record(record: t.Dict[str, t.Any], answer_table: t.List[str]):
+    """
+    Returns `(settings_fields, error)` of an exported block, run in the worker processes.
+    """
+    error = _check_field_types(record)
+    if error:
+        return None, error
+    content_settings, tokens, error = validate_editor_data(_editor_data(record))
+    if error:
+        return None, error
+    return build_settings_fields(content_settings, tokens, answer_table), None
+
+
+class _StateImporter:
+    """
+    Builds the imported learner states of a block, with their contribution to the answer statistics.
+    """
+
+    def __init__(self, settings):
+        answer_table = settings.get('answer_table') or []
+        correct_answers = settings.get('correct_answers') or []
+        self.answer_ids = {answer: answer_id for answer_id, answer in enumerate(answer_table)}
+        self.known_answers = self.answer_ids if answer_table else set(correct_answers)
+        self.answer_key = get_answer_key(correct_answers, settings.get('answer_matching'))
+        self.token_index = settings.get('token_index') if settings.get('use_tokenized_system') else None
+        self.weight = settings.get('weight', 1)
+        self.grading_type = settings.get('grading_type', 'all_or_nothing')
+
+    def build_state(self, record):
+        """
+        Returns the state fields of a state record, raises ValueError or TypeError if it is invalid.
+        """
+        answers = record.get('answers') or []
+        if not isinstance(answers, list) or not all(isinstance(answer, str) for answer in answers):
+            raise ValueError(answers)
+        answers = prepare_answers_list(answers)
+        contribution = {}
+        if answers:
+            ans_stat = AnswersStat(self.answer_key, answers, self.weight, self.grading_type)
+            contribution = statistics_contribution(answers, ans_stat.percent_completion, self.known_answers,
+                                                   find_token_ids(answers, self.token_index))
+        return {
+            'user_answers': encode_answers(answers, self.answer_ids),
+            'attempts': int(record.get('attempts') or 0),
+            'state_version': int(record.get('state_version') or 0),
+            'statistics_contribution': contribution,
+        }
+
+
+def _parse_lines(lines, first_line_num):
+    for line_num, line in enumerate(lines, first_line_num):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_num, None, 'Invalid JSON'
+            continue
+        if not isinstance(record, dict) or record.get('kind') not in ('block', 'state') or not record.get('id'):
+            yield line_num, None, 'Invalid record'
+            continue
+        yield line_num, record, None
+
+
+def import_blocks(store: FieldStore, in_file: t.Iterable[str], workers: t.Optional[int] = None,
+                  chunk_size=DEFAULT_CHUNK_SIZE) -> t.Dict[str, t.Any]:
+    """
+    Imports the records exported by `export_blocks`, existing blocks and learner states are updated.
+
+    Blocks are validated in a pool of `workers` processes (all CPUs by default, 0 to validate in this process),
+    invalid blocks are skipped along with their learner states. Returns the numbers of imported blocks and
+    states and the errors as `{'line': ..., 'id': ..., 'message': ...}`.
+    """
+    summary = {'blocks': 0, 'states': 0, 'errors': []}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    invalid_blocks = set()
+    importers = {}
+    # answer statistics rebuilt for the last imported block, from the states following it
+    statistics_block = None
+    statistics = None
+
+    def get_importer(usage_id):
+        if usage_id not in importers:
+            settings = store.get_block(usage_id)
+            importers.clear()
+            importers[usage_id] = None if settings is None else _StateImporter(settings)
+        return importers[usage_id]
+
+    try:
+        for chunk_num, lines in enumerate(iter_batches(in_file, chunk_size)):
+            records = []
+            for line_num, record, error in _parse_lines(lines, chunk_num * chunk_size + 1):
+                if error:
+                    summary['errors'].append({'line': line_num, 'id': None, 'message': error})
+                else:
+                    records.append((line_num, record))
+
+            block_records = [record for _, record in records if record['kind'] == 'block']
+            answer_tables = []
+            for record in block_records:
+                settings = store.get_block(record['id'])
+                answer_tables.append((settings or {}).get('answer_table') or [])
+            if executor is not None and len(block_records) > 1:
+                results = iter(executor.map(validate_block_record, block_records, answer_tables,
+                                            chunksize=max(1, len(block_records) // (workers * 4))))
+            else:
+                results = iter(map(validate_block_record, block_records, answer_tables))
+
+            states = []
+            for line_num, record in records:
+                usage_id = record['id']
+                if record['kind'] == 'block':
+                    if states:
+                        _save_states(store, states, summary)
+                        states = []
+                    if statistics_block is not None:
+                        store.save_answer_statistics(statistics_block, statistics)
+                        statistics_block = None
+                    fields, error = next(results)
+                    if error:
+                        invalid_blocks.add(usage_id)
+                        summary['errors'].append({'line': line_num, 'id': usage_id, 'message': error})
+                        continue
+                    invalid_blocks.discard(usage_id)
+                    store.save_block(usage_id, fields)
+                    importers.pop(usage_id, None)
+                    statistics_block, statistics = usage_id, {}
+                    summary['blocks'] += 1
+                    continue
+
+                if usage_id in invalid_blocks:
+                    continue
+                importer = get_importer(usage_id)
+                if importer is None:
+                    summary['errors'].append({'line': line_num, 'id': usage_id, 'message': 'Unknown block'})
+                    continue
+                if states and states[-1][0] != usage_id:
+                    _save_states(store, states, summary)
+                    states = []
+                try:
+                    state = importer.build_state(record)
+                except (ValueError, TypeError):
+                    summary['errors'].append({'line': line_num, 'id': usage_id, 'message': 'Invalid state'})
+                    continue
+                if usage_id == statistics_block and state['statistics_contribution']:
+                    apply_statistics_delta(statistics, state['statistics_contribution'], 1)
+                states.append((usage_id, record.get('user'), state))
+            if states:
+                _save_states(store, states, summary)
+        if statistics_block is not None:
+            store.save_answer_statistics(statistics_block, statistics)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return summary
+
+
+def _save_states(store, states, summary):
+    store.save_user_states(states[0][0], [(user_id, state) for _, user_id, state in states])
+    summary['states'] += len(states)
@@ -0,0 +1,137 @@
+"""
+Splitting of large passages into chunks rendered separately.
+
+Passages longer than `LARGE_TEXT_THRESHOLD` characters are split when the block is saved in Studio, the
+chunks are stored in the block settings as offsets into the text:
+
+    {
+        'text_hash': '<hash of the text the offsets refer to>',
+        'chunks': [[start, end, first_token_id], ...],
+    }
+
+Chunks end right before a top-level block element (paragraph, list, table...), so they never cut a token
+or any other element. `first_token_id` is the id of the first token in the chunk, token ids stay the ones
+of the whole text.
+"""
+from __future__ import absolute_import
+
+import typing as t
+
+from .tokens import OPEN_START, OffsetHTMLParser
+
+LARGE_TEXT_THRESHOLD = 50000
+TEXT_CHUNK_SIZE = 10000
+
+CHUNK_OPEN_TAG = '<div class="th-text-chunk" data-th-chunk="%d">'
+PENDING_CHUNK_TAG = '<div class="th-text-chunk" data-th-chunk="%d" data-th-chunk-pending="true"></div>'
+CHUNK_CLOSE_TAG = '</div>'
+
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset', 'figure', 'footer',
+    'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'ol', 'p', 'pre', 'section', 'table', 'ul',
+])
+# elements without closing tags, paragraphs are often left unclosed and are closed by the next block anyway
+UNNESTED_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'p', 'param', 'source',
+    'track', 'wbr',
+])
+
+
+class BoundaryParser(OffsetHTMLParser):
+    """
+    Collector of the offsets of the top-level block elements, see `iter_chunk_boundaries`.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.boundaries = []
+        self._depth = 0
+
+    def _add_boundary(self, tag):
+        if self._depth == 0 and tag in BLOCK_TAGS:
+            offset = self._offset()
+            if offset > 0:
+                self.boundaries.append(offset)
+
+    def handle_starttag(self, tag, attrs):
+        self._add_boundary(tag)
+        if tag not in UNNESTED_TAGS:
+            self._depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._add_boundary(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in UNNESTED_TAGS:
+            self._depth = max(self._depth - 1, 0)
+
+    def parse(self) -> t.List[int]:
+        self.feed(self.text)
+        self.close()
+        return self.boundaries
+
+
+def iter_chunk_boundaries(text: str) -> t.Iterator[int]:
+    """
+    Yields the offsets of the top-level block elements of the html.
+
+    Tags inside comments, CDATA sections, scripts and styles are skipped, a chunk never ends inside them.
+    """
+    try:
+        boundaries = BoundaryParser(text).parse()
+    except Exception:  # pylint: disable=broad-except
+        # the text is rendered at once if the stdlib parser fails on it
+        boundaries = []
+    return iter(boundaries)
+
+
+def split_text(text: str, tokens: t.Optional[t.List[list]] = None,
+               chunk_size=TEXT_CHUNK_SIZE) -> t.List[t.List[int]]:
+    """
+    Returns `[start, end, first_token_id]` of chunks of at least `chunk_size` characters (but the last one).
+    """
+    boundaries = []
+    start = 0
+    for boundary in iter_chunk_boundaries(text):
+        if boundary - start >= chunk_size:
+            boundaries.append((start, boundary))
+            start = boundary
+    boundaries.append((start, len(text)))
+
+    chunks = []
+    token_id = 0
+    tokens = tokens or []
+    for start, end in boundaries:
+        while token_id < len(tokens) and tokens[token_id][OPEN_START] < start:
+            token_id += 1
+        chunks.append([start, end, token_id])
+    return chunks
+
+
+def build_text_chunks(text: str, text_hash: str, tokens: t.Optional[t.List[list]] = None,
+                      threshold=LARGE_TEXT_THRESHOLD, chunk_size=TEXT_CHUNK_SIZE) -> t.Dict[str, t.Any]:
+    """
+    Returns the chunks of the text to save in the block settings, or an empty dict for short texts.
+    """
+    if len(text) < threshold:
+        return {}
+    chunks = split_text(text, tokens, chunk_size)
+    if len(chunks) < 2:
+        return {}
+    return {
+        'text_hash': text_hash,
+        'chunks': chunks,
+    }
+
+
+def render_chunk_containers(chunks: t.List[t.Optional[str]]) -> str:
+    """
+    Wraps the rendered chunks into their containers, chunks that are not rendered yet (None) get empty ones.
+    """
+    parts = []
+    for chunk_id, chunk in enumerate(chunks):
+        if chunk is None:
+            parts.append(PENDING_CHUNK_TAG % chunk_id)
+        else:
+            parts.extend((CHUNK_OPEN_TAG % chunk_id, chunk, CHUNK_CLOSE_TAG))
+    return "".join(parts)
@@ -0,0 +1,108 @@
+"""
+Server-side rendering of the highlights of learners' saved answers in free selection mode.
+"""
+from __future__ import absolute_import
+
+import re
+import typing as t
+from collections import deque
+
+RE_TAG_SPLIT = re.compile(r"(<[^>]*>)")
+
+HIGHLIGHT_OPEN_TAG = '<span class="th-no-select th-%d">'
+HIGHLIGHT_CLOSE_TAG = '</span>'
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher finding all occurrences of a set of patterns in a single pass over the text.
+    """
+
+    def __init__(self, patterns: t.List[str]):
+        self.patterns = patterns
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            if pattern:
+                self._add(pattern, pattern_id)
+        self._build()
+
+    def _add(self, pattern, pattern_id):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(pattern_id)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> t.Iterator[t.Tuple[int, int]]:
+        """
+        Yields `(end, pattern_id)` of every occurrence, `end` being the position after the last character.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                yield position + 1, pattern_id
+
+    def find_non_overlapping(self, text: str) -> t.List[t.Tuple[int, int, int]]:
+        """
+        Returns `(start, end, pattern_id)` of the leftmost-longest non-overlapping occurrences.
+        """
+        matches = sorted(
+            ((end - len(self.patterns[pattern_id]), end, pattern_id) for end, pattern_id in self.iter_matches(text)),
+            key=lambda match: (match[0], match[0] - match[1]),
+        )
+        result = []
+        covered_until = 0
+        for start, end, pattern_id in matches:
+            if start >= covered_until:
+                result.append((start, end, pattern_id))
+                covered_until = end
+        return result
+
+
+def highlight_html(html: str, answers: t.List[str]) -> str:
+    """
+    Wraps every occurrence of the answers found in the text nodes of the html into highlight spans.
+
+    The spans get the same classes the client-side code used to add for saved answers (`th-<answer index>`).
+    """
+    if not any(answers):
+        return html
+    matcher = AhoCorasick(answers)
+    parts = []
+    for segment in RE_TAG_SPLIT.split(html):
+        if not segment or segment.startswith('<'):
+            parts.append(segment)
+            continue
+        position = 0
+        for start, end, pattern_id in matcher.find_non_overlapping(segment):
+            parts.append(segment[position:start])
+            parts.append(HIGHLIGHT_OPEN_TAG % pattern_id)
+            parts.append(segment[start:end])
+            parts.append(HIGHLIGHT_CLOSE_TAG)
+            position = end
+        parts.append(segment[position:])
+    return "".join(parts)
@@ -0,0 +1,174 @@
+"""
+Optional timing of the block hot paths.
+
+Enabled through the block settings, e.g. in the LMS/CMS settings:
+
+    XBLOCK_SETTINGS = {
+        'text-highlighter': {
+            'instrumentation': {'exporter': 'statsd', 'host': 'localhost', 'port': 8125, 'prefix': 'text_highlighter'},
+        },
+    }
+
+Supported exporters are `log`, `statsd` (UDP) and `histogram` (in-process, see `histogram_exporter`).
+Without the setting the timers are a shared no-op context manager.
+"""
+from __future__ import absolute_import
+
+import bisect
+import functools
+import json
+import logging
+import socket
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+
+class NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Timer:
+    __slots__ = ('exporter', 'name', 'started')
+
+    def __init__(self, exporter, name):
+        self.exporter = exporter
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.exporter.record(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+def timed(name):
+    """
+    Decorator timing a block method as a whole through the block `_timer(name)`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self._timer(name):  # pylint: disable=protected-access
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class LogExporter:
+    def __init__(self, level='INFO', **kwargs):  # pylint: disable=unused-argument
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    def record(self, name, duration_ms):
+        log.log(self.level, "text-highlighter timing %s %.3fms", name, duration_ms)
+
+
+class StatsdExporter:
+    """
+    Sends timings as StatsD `ms` metrics over UDP, send errors are ignored.
+    """
+
+    def __init__(self, host='localhost', port=8125, prefix='text_highlighter', **kwargs):  # pylint: disable=unused-argument
+        self.address = (host, int(port))
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def record(self, name, duration_ms):
+        try:
+            self.socket.sendto(f"{self.prefix}.{name}:{duration_ms:.3f}|ms".encode('ascii'), self.address)
+        except OSError:
+            pass
+
+
+class HistogramExporter:
+    """
+    Keeps per-phase counts of timings in fixed millisecond buckets.
+    """
+    DEFAULT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, **kwargs):  # pylint: disable=unused-argument
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def record(self, name, duration_ms):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = {
+                    'count': 0, 'sum': 0.0, 'counts': [0] * (len(self.buckets) + 1)
+                }
+            histogram['count'] += 1
+            histogram['sum'] += duration_ms
+            histogram['counts'][bisect.bisect_left(self.buckets, duration_ms)] += 1
+
+    def snapshot(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        """
+        Returns the histograms keyed by phase, `counts[i]` being the number of timings <= `buckets[i]` ms
+        (and above the previous bucket), the last one counting the timings above the largest bucket.
+        """
+        with self._lock:
+            return {
+                name: {'count': histogram['count'], 'sum': histogram['sum'], 'buckets': list(self.buckets),
+                       'counts': list(histogram['counts'])}
+                for name, histogram in self._histograms.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+EXPORTERS = {
+    'log': LogExporter,
+    'statsd': StatsdExporter,
+    'histogram': HistogramExporter,
+}
+
+
+@functools.lru_cache(maxsize=16)
+def _create_exporter(config_json):
+    """
+    Returns the exporter of the configuration, or None if it is invalid: timing must never break the block.
+    """
+    config = json.loads(config_json)
+    exporter_class = EXPORTERS.get(config.pop('exporter', None))
+    if exporter_class is None:
+        log.warning("Unknown text-highlighter instrumentation exporter in %s", config_json)
+        return None
+    try:
+        return exporter_class(**config)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Invalid text-highlighter instrumentation settings %s", config_json)
+        return None
+
+
+def get_exporter(config: t.Optional[t.Dict[str, t.Any]]):
+    """
+    Returns the exporter configured by the `instrumentation` block setting, created once per configuration.
+    """
+    if not config:
+        return None
+    return _create_exporter(json.dumps(config, sort_keys=True))
+
+
+def histogram_exporter(**config) -> HistogramExporter:
+    """
+    Returns the in-process histogram exporter for the given options, to read its snapshot.
+    """
+    config['exporter'] = 'histogram'
+    return get_exporter(config)
@@ -0,0 +1,195 @@
+"""
+Matching of learners' answers against the correct answers of a block.
+
+The matching is configured per block by the `answer_matching` setting:
+
+    {
+        'ignore_case': True,         # case folding
+        'trim_punctuation': True,    # punctuation around the answer is ignored, e.g. "policy." matches "policy"
+        'normalize_unicode': True,   # NFKC normalization, typographic quotes and dashes as their ASCII forms
+        'max_edits': 1,              # answers at most this many insertions, deletions or substitutions away
+    }
+
+Without options answers must be equal, which is also the fastest path. Matchers are compiled along with the
+answer key of the block settings (see `get_answer_key`): normalized answers are looked up in a dict. Approximate
+matches of answers up to `MAX_FUZZY_LENGTH` characters go through an index of the answers with up to `max_edits`
+characters deleted, so a lookup costs the same whatever the number of answers. The index grows with
+`length ** max_edits` per answer, longer answers are compared with a banded edit distance against the answers
+of about the same length instead.
+"""
+from __future__ import absolute_import
+
+import re
+import typing as t
+import unicodedata
+
+MAX_EDITS_LIMIT = 2
+# shorter answers are matched exactly, a typo there would often make another word
+MIN_FUZZY_LENGTH = 4
+# longer answers are left out of the deletions index and compared one by one within their length bucket
+MAX_FUZZY_LENGTH = 16
+# matches remembered per matcher, learners tend to select the same texts
+MATCH_CACHE_SIZE = 1000
+
+MATCHING_OPTIONS = ('ignore_case', 'trim_punctuation', 'normalize_unicode')
+
+RE_COMBINE_WHITESPACE = re.compile(r"\s+")
+TYPOGRAPHIC_CHARS = str.maketrans({
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"', '″': '"', '«': '"', '»': '"',
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-', '−': '-',
+})
+
+
+def clean_matching_options(options: t.Optional[t.Dict[str, t.Any]]) -> t.Dict[str, t.Any]:
+    """
+    Returns the valid options only, with the default values left out.
+    """
+    cleaned = {}
+    for name in MATCHING_OPTIONS:
+        if (options or {}).get(name):
+            cleaned[name] = True
+    try:
+        max_edits = int((options or {}).get('max_edits') or 0)
+    except (ValueError, TypeError):
+        max_edits = 0
+    if max_edits > 0:
+        cleaned['max_edits'] = min(max_edits, MAX_EDITS_LIMIT)
+    return cleaned
+
+
+def _is_punctuation(char):
+    return unicodedata.category(char)[0] in 'PS'
+
+
+def normalize_answer(answer: str, options: t.Dict[str, t.Any]) -> str:
+    if options.get('normalize_unicode'):
+        answer = unicodedata.normalize('NFKC', answer).translate(TYPOGRAPHIC_CHARS)
+    if options.get('trim_punctuation'):
+        start, end = 0, len(answer)
+        while start < end and (_is_punctuation(answer[start]) or answer[start].isspace()):
+            start += 1
+        while end > start and (_is_punctuation(answer[end - 1]) or answer[end - 1].isspace()):
+            end -= 1
+        answer = answer[start:end]
+    if options.get('ignore_case'):
+        answer = answer.casefold()
+    return RE_COMBINE_WHITESPACE.sub(" ", answer).strip()
+
+
+def _deletions(text, max_edits):
+    """
+    Returns the strings made by deleting up to `max_edits` characters of the text.
+    """
+    variants = {text}
+    deleted = {text}
+    for _ in range(max_edits):
+        deleted = {variant[:i] + variant[i + 1:] for variant in deleted for i in range(len(variant))}
+        variants |= deleted
+    return variants
+
+
+def edit_distance(first: str, second: str, max_distance: int) -> int:
+    """
+    Returns the Levenshtein distance of the strings, or `max_distance + 1` if it's larger than `max_distance`.
+
+    Only the band of `max_distance` cells around the diagonal is computed.
+    """
+    too_far = max_distance + 1
+    if abs(len(first) - len(second)) > max_distance:
+        return too_far
+    previous = [j if j <= max_distance else too_far for j in range(len(second) + 1)]
+    for i, first_char in enumerate(first, 1):
+        current = [too_far] * (len(second) + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(second), i + max_distance) + 1):
+            distance = previous[j - 1] + (first_char != second[j - 1])
+            if previous[j] + 1 < distance:
+                distance = previous[j] + 1
+            if current[j - 1] + 1 < distance:
+                distance = current[j - 1] + 1
+            current[j] = distance
+            if distance < row_min:
+                row_min = distance
+        if row_min > max_distance:
+            return too_far
+        previous = current
+    return min(previous[-1], too_far)
+
+
+class AnswerMatcher:
+    """
+    Compiled matcher of the correct answers of a block, see the module docstring.
+    """
+    __slots__ = ('answers', 'options', 'exact', 'max_edits', 'keys', 'answer_ids', 'deletions_index',
+                 'long_answer_ids', 'matches')
+
+    def __init__(self, answers: t.Sequence[str], options: t.Optional[t.Dict[str, t.Any]] = None):
+        self.answers = tuple(answers)
+        self.options = clean_matching_options(options)
+        self.exact = not self.options
+        self.max_edits = self.options.get('max_edits', 0)
+        self.keys = tuple(self.normalize(answer) for answer in self.answers)
+        self.answer_ids = {}
+        for answer_id, key in enumerate(self.keys):
+            self.answer_ids.setdefault(key, answer_id)
+        self.deletions_index = {}
+        # ids of the answers longer than MAX_FUZZY_LENGTH by length
+        self.long_answer_ids = {}
+        self.matches = {}
+        if self.max_edits:
+            for key, answer_id in self.answer_ids.items():
+                if len(key) > MAX_FUZZY_LENGTH:
+                    self.long_answer_ids.setdefault(len(key), []).append(answer_id)
+                elif len(key) >= MIN_FUZZY_LENGTH:
+                    for variant in _deletions(key, self.max_edits):
+                        self.deletions_index.setdefault(variant, []).append(answer_id)
+
+    @property
+    def size(self) -> int:
+        """
+        Rough number of entries the matcher holds, to bound the memory of the cached answer keys.
+        """
+        if self.exact:
+            return len(self.answers)
+        return len(self.answers) + len(self.deletions_index) + MATCH_CACHE_SIZE
+
+    def normalize(self, answer: str) -> str:
+        return answer if self.exact else normalize_answer(answer, self.options)
+
+    def match(self, answer: str) -> t.Optional[int]:
+        """
+        Returns the id of the correct answer matching the answer, the closest one for approximate matches.
+        """
+        if self.exact:
+            return self.answer_ids.get(answer)
+        try:
+            return self.matches[answer]
+        except KeyError:
+            pass
+        answer_id = self._match(self.normalize(answer))
+        if len(self.matches) >= MATCH_CACHE_SIZE:
+            self.matches.clear()
+        self.matches[answer] = answer_id
+        return answer_id
+
+    def _match(self, key):
+        answer_id = self.answer_ids.get(key)
+        if answer_id is not None or not self.max_edits or len(key) < MIN_FUZZY_LENGTH - self.max_edits:
+            return answer_id
+        candidate_ids = set()
+        if self.deletions_index and len(key) <= MAX_FUZZY_LENGTH + self.max_edits:
+            for variant in _deletions(key, self.max_edits):
+                candidate_ids.update(self.deletions_index.get(variant, ()))
+        if self.long_answer_ids and len(key) > MAX_FUZZY_LENGTH - self.max_edits:
+            for length in range(len(key) - self.max_edits, len(key) + self.max_edits + 1):
+                candidate_ids.update(self.long_answer_ids.get(length, ()))
+        best_id, best_distance = None, self.max_edits + 1
+        for candidate_id in sorted(candidate_ids):
+            distance = edit_distance(key, self.keys[candidate_id], self.max_edits)
+            if distance < best_distance:
+                best_id, best_distance = candidate_id, distance
+        return best_id
+
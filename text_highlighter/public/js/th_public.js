@@ -33,6 +33,10 @@ function TextHighlighterBlock(runtime, element, params) {
         thAnswersNum = parseInt(thAnswersNum, 10);
     }
     var answers = $(thSelectedBlocks).data('selected-texts');
+    // token ids of the selected tokens keyed by their text, sent along with the answers
+    var answerTokenIds = {};
+    // unique ids of the selections keyed by their text
+    var answerUniqueIds = {};
     var answerIsPresented = false;
     if (answers === "") {
         answers = [];
@@ -40,38 +44,274 @@ function TextHighlighterBlock(runtime, element, params) {
         answerIsPresented = true;
     }
 
-    function addSelection(selectedText, uniqueId, displayRemoveBtn) {
-        if (displayRemoveBtn) {
-            thSelectedBlocks.append("<div class='th_text_highlighter th-selected-block-" + uniqueId + "'><span class='txt-val'>" + selectedText + "</span> <a href='javascript: void(0);' class='th-remove-block th-remove-link-" + uniqueId + "' data-block-id='" + uniqueId + "'>[remove]</a></div>");
+    var draftTexts = $(thSelectedBlocks).data('draft-texts') || [];
+    // selection changes are saved as a draft once the learner stops changing them for a while
+    var draftSaveDelay = 1000;
+    var draftTimer = null;
+    // delays of the retries of a submission that failed because of network or server errors
+    var submitRetryDelays = [1000, 2000, 4000, 8000];
+
+    // highlight wrapper nodes of the selections added on this page keyed by their unique id
+    var highlights = {};
+    var selectionCounter = 0;
+    // range of the last selection made in the text, highlighted when it's added to the answers
+    var pendingRange = null;
+
+    // large texts come in chunks, the ones not rendered with the page are loaded when they get close to the viewport
+    var thChunksTotal = parseInt(thText.data('chunks-total'), 10) || 0;
+    var chunksPageSize = 4;
+    var chunksRequested = {};
+
+    function nextUniqueId() {
+        selectionCounter += 1;
+        return 'th-sel-' + selectionCounter;
+    }
+
+    function textNodesInRange(range) {
+        var root = range.commonAncestorContainer;
+        if (root.nodeType === Node.TEXT_NODE) {
+            return [root];
         }
-        if (!thUseTokenizedSystem) {
-            thText.html(thText.html().replace(new RegExp(selectedText, "g"), '<span class="th-no-select ' + uniqueId + '">' + selectedText + '</span>'));
+        var nodes = [];
+        var walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT, {
+            acceptNode: function(node) {
+                return range.intersectsNode(node) ? NodeFilter.FILTER_ACCEPT : NodeFilter.FILTER_REJECT;
+            }
+        });
+        while (walker.nextNode()) {
+            nodes.push(walker.currentNode);
         }
-        if (displayRemoveBtn) {
-            $element.find('.th-remove-link-' + uniqueId).click(function() {
-                var blockId = $(this).data('block-id');
-                var txt = $element.find('.th-selected-block-' + uniqueId + ' .txt-val').text();
-                if (!thUseTokenizedSystem) {
-                    $element.find('.' + blockId).contents().unwrap();
-                } else if (thUseTokenizedSystem && !thNonLimitedNumberOfAnswers) {
-                    $(tooltipLimitation).hide();
+        return nodes;
+    }
+
+    function highlightRange(range, uniqueId) {
+        var wrappers = [];
+        textNodesInRange(range).forEach(function(node) {
+            var start = (node === range.startContainer) ? range.startOffset : 0;
+            var end = (node === range.endContainer) ? range.endOffset : node.length;
+            if (start >= end) {
+                return;
+            }
+            if (end < node.length) {
+                node.splitText(end);
+            }
+            if (start > 0) {
+                node = node.splitText(start);
+            }
+            if ($.trim(node.nodeValue) === '') {
+                return;
+            }
+            var wrapper = document.createElement('span');
+            wrapper.className = 'th-no-select ' + uniqueId;
+            node.parentNode.insertBefore(wrapper, node);
+            wrapper.appendChild(node);
+            wrappers.push(wrapper);
+        });
+        return wrappers;
+    }
+
+    function unwrap(wrapper) {
+        var parent = wrapper.parentNode;
+        if (!parent) {
+            return;
+        }
+        while (wrapper.firstChild) {
+            parent.insertBefore(wrapper.firstChild, wrapper);
+        }
+        parent.removeChild(wrapper);
+    }
+
+    function removeHighlight(uniqueId) {
+        (highlights[uniqueId] || []).forEach(unwrap);
+        delete highlights[uniqueId];
+    }
+
+    function addSelection(selectedText, uniqueId, range) {
+        answerUniqueIds[selectedText] = uniqueId;
+        thSelectedBlocks.append("<div class='th_text_highlighter th-selected-block-" + uniqueId + "'><span class='txt-val'>" + selectedText + "</span> <a href='javascript: void(0);' class='th-remove-block th-remove-link-" + uniqueId + "' data-block-id='" + uniqueId + "'>[remove]</a></div>");
+        if (!thUseTokenizedSystem && range) {
+            highlights[uniqueId] = highlightRange(range, uniqueId);
+        }
+    }
+
+    function updateSubmitState() {
+        if ((!thNonLimitedNumberOfAnswers && (answers.length === thAnswersNum))
+          || (thNonLimitedNumberOfAnswers && (answers.length > 0))) {
+            $(thSubmit).removeAttr("disabled");
+        } else {
+            $(thSubmit).attr("disabled", "disabled");
+        }
+    }
+
+    function cancelDraftSave() {
+        if (draftTimer) {
+            clearTimeout(draftTimer);
+            draftTimer = null;
+        }
+    }
+
+    function scheduleDraftSave() {
+        if (thIsStudioView) {
+            return;
+        }
+        cancelDraftSave();
+        draftTimer = setTimeout(function() {
+            draftTimer = null;
+            if (answerIsPresented) {
+                return;
+            }
+            $.ajax({
+                type: "POST",
+                url: runtime.handlerUrl(element, 'save_draft'),
+                data: JSON.stringify({
+                    answers: answers
+                })
+            });
+        }, draftSaveDelay);
+    }
+
+    function restoreDraft() {
+        // the server renders the highlights of the draft answers the same way as for saved answers
+        draftTexts.forEach(function(text, i) {
+            var uniqueId = 'th-' + i;
+            answers.push(text);
+            addSelection(text, uniqueId, null);
+            if (!thUseTokenizedSystem) {
+                highlights[uniqueId] = $element.find('.th-no-select.' + uniqueId).toArray();
+            }
+        });
+        if (thUseTokenizedSystem) {
+            selectDraftTokens(thText);
+        }
+        updateSubmitState();
+    }
+
+    function selectDraftTokens(container) {
+        // the first token with the text of a draft answer gets selected, tokens of chunks loaded later included
+        $(container).find('.th-cl-token').not('.th-cl-token-selected').each(function() {
+            var token = $(this);
+            var text = $.trim(token.text()).replace(/\s+/g, ' ');
+            var uniqueId = answerUniqueIds[text];
+            if (uniqueId === undefined || answerTokenIds[text] !== undefined
+              || $element.find('.th-cl-token-selected[data-th-link-id="' + uniqueId + '"]').length) {
+                return;
+            }
+            token.addClass('th-cl-token-selected').attr("data-th-link-id", uniqueId);
+            if (token.data('th-token-id') !== undefined) {
+                answerTokenIds[text] = parseInt(token.data('th-token-id'), 10);
+            }
+        });
+    }
+
+    function adoptChunkHighlights(chunk, highlightedTexts) {
+        // the server highlights the answers it knows with their index, switch them to the selections on this page
+        chunk.find('.th-no-select').each(function() {
+            var match = /(?:^|\s)th-(\d+)(?:\s|$)/.exec(this.className);
+            if (answerIsPresented || !match) {
+                return;
+            }
+            var uniqueId = answerUniqueIds[highlightedTexts[parseInt(match[1], 10)]];
+            if (uniqueId === undefined || !highlights[uniqueId]) {
+                unwrap(this);
+                return;
+            }
+            this.className = 'th-no-select ' + uniqueId;
+            highlights[uniqueId].push(this);
+        });
+    }
+
+    function pendingChunk(index) {
+        return thText.find('.th-text-chunk[data-th-chunk="' + index + '"][data-th-chunk-pending]');
+    }
+
+    function loadChunks(start) {
+        // only chunks neither loaded nor requested yet, replacing a loaded chunk would drop the learner's highlights
+        var count = 0;
+        while (count < chunksPageSize && !chunksRequested[start + count] && pendingChunk(start + count).length) {
+            chunksRequested[start + count] = true;
+            count++;
+        }
+        if (!count) {
+            return;
+        }
+        $.ajax({
+            type: "POST",
+            url: runtime.handlerUrl(element, 'load_text_chunks'),
+            data: JSON.stringify({
+                start: start,
+                count: count
+            }),
+            success: function(response) {
+                if (response.result !== 'success') {
+                    return;
                 }
-                answers = answers.filter(function(v) {
-                    return v !== txt;
+                response.chunks.forEach(function(item) {
+                    var chunk = pendingChunk(item.index);
+                    if (!chunk.length) {
+                        return;
+                    }
+                    chunk.html(item.html).removeAttr('data-th-chunk-pending');
+                    if (thUseTokenizedSystem) {
+                        selectDraftTokens(chunk);
+                    } else {
+                        adoptChunkHighlights(chunk, response.highlighted_texts);
+                    }
                 });
-                if ((!thNonLimitedNumberOfAnswers && (answers.length < thAnswersNum))
-                  || (thNonLimitedNumberOfAnswers && (answers.length === 0))) {
-                    $(thSubmit).attr("disabled", "disabled");
-                }
-                $element.find('.th-selected-block-' + uniqueId).remove();
-                if (thUseTokenizedSystem) {
-                    $element.find('.th-cl-token-selected[data-th-link-id="' + uniqueId + '"]')
-                        .removeAttr("data-th-link-id").removeClass("th-cl-token-selected");
+            },
+            error: function() {
+                for (var i = start; i < start + count; i++) {
+                    delete chunksRequested[i];
                 }
+            }
+        });
+    }
+
+    function observeChunks() {
+        var pending = thText.find('.th-text-chunk[data-th-chunk-pending]');
+        if (!('IntersectionObserver' in window)) {
+            pending.each(function() {
+                loadChunks(parseInt($(this).data('th-chunk'), 10));
             });
+            return;
         }
+        var observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    loadChunks(parseInt($(entry.target).data('th-chunk'), 10));
+                }
+            });
+        }, {rootMargin: '1000px 0px'});
+        pending.each(function() {
+            observer.observe(this);
+        });
     }
 
+    $element.on('click', '.th-remove-block', function() {
+        var uniqueId = $(this).data('block-id');
+        var txt = $element.find('.th-selected-block-' + uniqueId + ' .txt-val').text();
+        if (!thUseTokenizedSystem) {
+            removeHighlight(uniqueId);
+        } else if (!thNonLimitedNumberOfAnswers) {
+            $(tooltipLimitation).hide();
+        }
+        answers = answers.filter(function(v) {
+            return v !== txt;
+        });
+        delete answerTokenIds[txt];
+        delete answerUniqueIds[txt];
+        if ((!thNonLimitedNumberOfAnswers && (answers.length < thAnswersNum))
+          || (thNonLimitedNumberOfAnswers && (answers.length === 0))) {
+            $(thSubmit).attr("disabled", "disabled");
+        }
+        $element.find('.th-selected-block-' + uniqueId).remove();
+        if (thUseTokenizedSystem) {
+            $element.find('.th-cl-token-selected[data-th-link-id="' + uniqueId + '"]')
+                .removeAttr("data-th-link-id").removeClass("th-cl-token-selected");
+        }
+        scheduleDraftSave();
+    });
+
     function placeTooltip(xPos, yPos) {
         $(tooltip).css({
             top: yPos + 'px',
@@ -103,7 +343,7 @@ function TextHighlighterBlock(runtime, element, params) {
         var selectedText = $(thSelText).html();
         selectedText = $.trim(selectedText);
         if (selectedText && (selectedText !== '') && (answers.indexOf(selectedText) === -1)) {
-            var uniqueId = 'th-' + new Date().getTime();
+            var uniqueId = nextUniqueId();
             answers.push(selectedText);
             if (!thIsStudioView) {
                 if ((!thNonLimitedNumberOfAnswers && (answers.length === thAnswersNum))
@@ -111,13 +351,15 @@ function TextHighlighterBlock(runtime, element, params) {
                     $(thSubmit).removeAttr("disabled");
                 }
             }
-            addSelection(selectedText, uniqueId, true);
+            addSelection(selectedText, uniqueId, pendingRange);
+            scheduleDraftSave();
         }
+        pendingRange = null;
         $(tooltip).hide();
     });
 
     if (thUseTokenizedSystem) {
-        $element.find('.th-cl-token').click(function(e) {
+        $element.on('click', '.th-cl-token', function(e) {
             if (!actionsAllowed()) {
                 return;
             }
@@ -141,7 +383,7 @@ function TextHighlighterBlock(runtime, element, params) {
                 $(tooltipLimitation).hide();
             }
             if (selectedText && selectedText !== '' && (answers.indexOf(selectedText) === -1)) {
-                var uniqueId = 'th-' + new Date().getTime();
+                var uniqueId = nextUniqueId();
                 answers.push(selectedText);
                 if (!thIsStudioView) {
                     if ((!thNonLimitedNumberOfAnswers && (answers.length === thAnswersNum))
@@ -149,8 +391,13 @@ function TextHighlighterBlock(runtime, element, params) {
                         $(thSubmit).removeAttr("disabled");
                     }
                 }
-                addSelection(selectedText, uniqueId, true);
+                var tokenId = $(this).data('th-token-id');
+                if (tokenId !== undefined) {
+                    answerTokenIds[selectedText] = parseInt(tokenId, 10);
+                }
+                addSelection(selectedText, uniqueId, null);
                 $(this).addClass('th-cl-token-selected').attr("data-th-link-id", uniqueId);
+                scheduleDraftSave();
             }
         });
     } else {
@@ -167,6 +414,13 @@ function TextHighlighterBlock(runtime, element, params) {
                 return;
             }
             $(thSelText).html(selText);
+            pendingRange = null;
+            if (selText && selection.rangeCount > 0) {
+                var range = selection.getRangeAt(0);
+                if (thText[0].contains(range.commonAncestorContainer)) {
+                    pendingRange = range.cloneRange();
+                }
+            }
 
             //var x = e.pageX - $(thText).offset().left;
             //var y = thIsStudioView ? (e.pageY - $(thText).offset().top + 130) : e.pageY;
@@ -195,47 +449,88 @@ function TextHighlighterBlock(runtime, element, params) {
         });
     }
 
-    $(thSubmit).click(function () {
-        if (!actionsAllowed()) {
-            return;
+    function newSubmissionId() {
+        return 'sub-' + new Date().getTime().toString(36) + '-' + Math.random().toString(36).slice(2, 10);
+    }
+
+    function showSubmissionResult(response) {
+        $(thSelectedBlocks).removeClass('th-submitting');
+        $(thSelectedBlocks).html('<div>Your answers:</div>' +
+            '<div>' + response.selected_texts + '</div><br />' +
+            (thDisplayCorrectAnswersAfterResponse ? '<div>Correct answers:</div>' : '') +
+            (thDisplayCorrectAnswersAfterResponse ? ('<div>' + response.correct_answers_texts + '</div><br />') : ''));
+        $(thGradeTextBlock).html(response.grade_text);
+        $(thAttemptsText).show();
+        if (response.attempts_text !== "") {
+            $(thAttemptsTextInner).html(response.attempts_text);
         }
-        $(thSubmit).attr("disabled", "disabled");
-        thSubmissionError.hide();
+        if (response.display_reset_button) {
+            thAttemptsResetBlock.show();
+        }
+    }
+
+    function revertSubmission(message) {
+        answerIsPresented = false;
+        $(thSelectedBlocks).removeClass('th-submitting');
+        $(thSubmit).html('<span class="submit-label">Submit</span>').removeAttr("disabled");
+        thSubmissionError.show().html(message);
+    }
+
+    function sendSubmission(submission, attempt) {
         $.ajax({
             type: "POST",
             url: runtime.handlerUrl(element, 'publish_answers'),
-            data: JSON.stringify({
-                answers: answers
-            }),
+            data: JSON.stringify(submission),
             success: function (response) {
-                answerIsPresented = true;
-                $(thSubmit).html('<span class="submit-label">Submitted</span>');
-                $(thSelectedBlocks).html('<div>Your answers:</div>' +
-                    '<div>' + response.selected_texts + '</div><br />' +
-                    (thDisplayCorrectAnswersAfterResponse ? '<div>Correct answers:</div>' : '') +
-                    (thDisplayCorrectAnswersAfterResponse ? ('<div>' + response.correct_answers_texts + '</div><br />') : ''));
-                $(thGradeTextBlock).html(response.grade_text);
-                $(thAttemptsText).show();
-                if (response.attempts_text !== "") {
-                    $(thAttemptsTextInner).html(response.attempts_text);
-                }
-                if (response.display_reset_button) {
-                    thAttemptsResetBlock.show();
+                if (response.result === 'error') {
+                    revertSubmission(response.message);
+                    return;
                 }
+                showSubmissionResult(response);
             },
-            error: function() {
-                $(thSubmit).removeAttr("disabled");
-                thSubmissionError.show().html("Server error");
+            error: function(xhr) {
+                // the submission id makes the retries safe: the server ignores already processed submissions
+                if (attempt < submitRetryDelays.length && (xhr.status === 0 || xhr.status >= 500)) {
+                    setTimeout(function() {
+                        sendSubmission(submission, attempt + 1);
+                    }, submitRetryDelays[attempt]);
+                    return;
+                }
+                revertSubmission("Server error");
             }
         });
-    });
+    }
 
-    if (answerIsPresented) {
-        if (answers.length > 0) {
-            for (var i = 0; i < answers.length; i++) {
-                addSelection(answers[i], 'th-' + i, false);
-            }
+    $(thSubmit).click(function () {
+        if (!actionsAllowed()) {
+            return;
+        }
+        cancelDraftSave();
+        $(thSubmit).attr("disabled", "disabled");
+        thSubmissionError.hide();
+        var submission = {
+            answers: answers.slice(),
+            submission_id: newSubmissionId()
+        };
+        var tokenIds = answers.map(function(v) {
+            return answerTokenIds[v];
+        });
+        if (thUseTokenizedSystem && tokenIds.length && tokenIds.every(function(v) { return v !== undefined; })) {
+            submission.token_ids = tokenIds;
         }
+        // show the submission as accepted right away, the grade is filled in when the server responds
+        answerIsPresented = true;
+        $(thSubmit).html('<span class="submit-label">Submitted</span>');
+        $(thSelectedBlocks).addClass('th-submitting');
+        sendSubmission(submission, 0);
+    });
+
+    // highlights of the saved answers are rendered by the server (see `student_view`)
+    if (!answerIsPresented && draftTexts.length) {
+        restoreDraft();
+    }
+    if (thChunksTotal && !thIsStudioView) {
+        observeChunks();
     }
 
     $(thReset).click(function () {
@@ -245,16 +540,25 @@ function TextHighlighterBlock(runtime, element, params) {
             url: runtime.handlerUrl(element, 'reset_answers'),
             data: JSON.stringify({}),
             success: function (response) {
+                if (response.result === 'error') {
+                    thSubmissionError.show().html(response.message);
+                    return;
+                }
                 $(thSubmit).html('<span class="submit-label">Submit</span>');
                 $(thAttemptsText).hide();
                 $(thAttemptsResetBlock).hide();
                 answerIsPresented = false;
                 answers = [];
+                answerTokenIds = {};
+                answerUniqueIds = {};
+                highlights = {};
                 $(thAttemptsTextInner).html("");
                 $(thSelectedBlocks).html("");
                 $(thGradeTextBlock).html(response.grade_text);
                 if (!thUseTokenizedSystem) {
-                    $element.find('.th-no-select').contents().unwrap();
+                    $element.find('.th-no-select').each(function() {
+                        unwrap(this);
+                    });
                 }
             },
             error: function() {
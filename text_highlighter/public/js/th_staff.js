@@ -24,6 +24,12 @@ function TextHighlighterEditBlock(runtime, element, params) {
             var useTokenizedSystem = $element.find('#th_use_tokenized_system').is(':checked');
             var allowNonLimitedNumberAnswers = $element.find('#th_allow_non_limited_number_answers').is(':checked');
             var maxAttemptsNumber = $element.find('#th_max_attempts_number').val();
+            var answerMatching = {
+                'ignore_case': $element.find('#th_matching_ignore_case').is(':checked'),
+                'trim_punctuation': $element.find('#th_matching_trim_punctuation').is(':checked'),
+                'normalize_unicode': $element.find('#th_matching_normalize_unicode').is(':checked'),
+                'max_edits': parseInt($element.find('#th_matching_max_edits').val(), 10) || 0
+            };
 
             if ($.trim(displayName) === '') {
                 errMsgBlock.show().text(gettext('Error: "Name" is not set'));
@@ -56,7 +62,8 @@ function TextHighlighterEditBlock(runtime, element, params) {
                 'display_correct_answers_after_response': displayCorrectAnswersAfterResponse,
                 'non_limited_number_of_answers': allowNonLimitedNumberAnswers,
                 'use_tokenized_system': useTokenizedSystem,
-                'max_attempts_number': maxAttemptsNumber
+                'max_attempts_number': maxAttemptsNumber,
+                'answer_matching': answerMatching
             }), function(res) {
                 saveBtn.text(gettext('Save')).removeClass('disabled');
                 if (res.result === 'success') {
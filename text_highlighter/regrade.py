@@ -0,0 +1,164 @@
+"""
+Bulk regrading of stored learner answers against the current block settings, and recomputing of the block
+answer statistics from them (see `recompute_statistics`).
+
+Usage:
+
+    python -m text_highlighter.regrade --settings block.json < states.jsonl > grades.jsonl
+
+`block.json` holds `correct_answers`, `weight`, `grading_type`, `answer_matching` and `answer_table` of a block,
+every line of `states.jsonl` holds `{"user_id": ..., "user_answers": [...]}` with answers as stored in the user
+state.
+"""
+from __future__ import absolute_import
+
+import argparse
+import itertools
+import json
+import sys
+import time
+import typing as t
+
+from .text_highlighter import AnswersStat, apply_statistics_delta, decode_answers, get_answer_key
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def grade_event(ans_stat: AnswersStat) -> t.Dict[str, t.Any]:
+    """
+    Returns the payload of the 'grade' event for the given stat, same as `publish_answers` does.
+    """
+    return {
+        'value': ans_stat.percent_completion,
+        'max_value': 1,
+    }
+
+
+def iter_batches(iterable: t.Iterable, batch_size: int) -> t.Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_regrade(correct_answers: t.List[str], user_states: t.Iterable[t.Tuple[t.Any, t.List[str]]],
+                 weight=1, grading_type='all_or_nothing', batch_size=DEFAULT_BATCH_SIZE, matching=None):
+    """
+    Regrades `(user_id, user_answers)` pairs and yields lists of `(user_id, AnswersStat)`.
+
+    The states are consumed lazily one batch at a time, so memory stays flat whatever the number of learners.
+    """
+    answer_key = get_answer_key(correct_answers, matching)
+    for batch in iter_batches(user_states, batch_size):
+        user_ids = [user_id for user_id, _ in batch]
+        stats = AnswersStat.batch(answer_key, (user_answers or [] for _, user_answers in batch), weight, grading_type)
+        yield list(zip(user_ids, stats))
+
+
+def iter_user_states(block, usernames: t.Iterable[str]):
+    """
+    Yields `(username, user_answers)` of the given learners using the `user_state` service of the block.
+
+    Learners who never answered are skipped, answers are decoded with the block answer table.
+    """
+    user_state_service = block.runtime.service(block, 'user_state')
+    block_id = block.scope_ids.usage_id
+    answer_table = block.answer_table
+    for username in usernames:
+        state = user_state_service.get_state_as_dict(username, block_id)
+        user_answers = state.get('user_answers') if state else None
+        if user_answers:
+            yield username, decode_answers(user_answers, answer_table)
+
+
+def regrade_block(block, usernames: t.Iterable[str], publish: t.Callable[[t.Any, str, t.Dict], None],
+                  batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Regrades all learners of the block against its current settings.
+
+    `publish` is called as `publish(username, 'grade', event)` for every learner, so the caller
+    decides how grades are persisted (e.g. by sending the platform score signals).
+    Returns the number of regraded learners.
+    """
+    regraded = 0
+    states = iter_user_states(block, usernames)
+    for batch in iter_regrade(block.correct_answers, states, block.weight, block.grading_type, batch_size,
+                              block.answer_matching):
+        for username, ans_stat in batch:
+            publish(username, 'grade', grade_event(ans_stat))
+        regraded += len(batch)
+    return regraded
+
+
+def recompute_statistics(block, usernames: t.Iterable[str]) -> t.Dict[str, t.Any]:
+    """
+    Rebuilds the answer statistics of the block from the stored answers of the given learners.
+
+    The statistics are updated incrementally by every submission and the last write wins, so concurrent
+    submissions of different learners make the counts drift. Answers and scores are recomputed against the
+    current settings, tokens are taken from the learners' saved contributions when available. The statistics
+    are set on the block, which the caller saves, and returned.
+    """
+    user_state_service = block.runtime.service(block, 'user_state')
+    block_id = block.scope_ids.usage_id
+    answer_key = get_answer_key(block.correct_answers, block.answer_matching)
+    statistics = {}
+    for username in usernames:
+        state = user_state_service.get_state_as_dict(username, block_id)
+        user_answers = state.get('user_answers') if state else None
+        if not user_answers:
+            continue
+        answers = decode_answers(user_answers, block.answer_table)
+        ans_stat = AnswersStat(answer_key, answers, block.weight, block.grading_type)
+        token_ids = (state.get('statistics_contribution') or {}).get('tokens')
+        apply_statistics_delta(statistics, block.get_statistics_contribution(
+            answers, ans_stat.percent_completion, token_ids
+        ), 1)
+    block.answer_statistics = statistics
+    return statistics
+
+
+def _read_states(stream, answer_table):
+    for line in stream:
+        line = line.strip()
+        if line:
+            row = json.loads(line)
+            yield row.get('user_id'), decode_answers(row.get('user_answers') or [], answer_table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regrade stored Text Highlighter answers.")
+    parser.add_argument('--settings', required=True,
+                        help="JSON file with correct_answers, weight and grading_type of the block")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Report throughput in learners/sec to stderr")
+    args = parser.parse_args(argv)
+
+    with open(args.settings) as f:
+        settings = json.load(f)
+
+    started = time.perf_counter()
+    regraded = 0
+    results = iter_regrade(settings.get('correct_answers', []), _read_states(sys.stdin, settings.get('answer_table', [])),
+                           settings.get('weight', 1), settings.get('grading_type', 'all_or_nothing'),
+                           args.batch_size, settings.get('answer_matching'))
+    for batch in results:
+        sys.stdout.write("".join(
+            json.dumps({'user_id': user_id, 'grade': grade_event(ans_stat),
+                        'weighted_percent_completion': ans_stat.weighted_percent_completion}) + "\n"
+            for user_id, ans_stat in batch
+        ))
+        regraded += len(batch)
+    elapsed = time.perf_counter() - started
+
+    if args.benchmark:
+        rate = regraded / elapsed if elapsed else 0
+        sys.stderr.write(f"Regraded {regraded} learners in {elapsed:.3f}s ({rate:.0f} learners/sec)\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Rendering of the block templates.
+
+Templates are loaded and compiled on first use and then reused, the Django template machinery
+is only imported when the first template is rendered.
+"""
+from __future__ import absolute_import
+
+import functools
+
+I18N_TEMPLATETAGS = 'xblockutils.templatetags.i18n'
+
+
+@functools.lru_cache(maxsize=None)
+def get_template(template_path):
+    from django.template import Engine, Template
+    from django.template.backends.django import get_installed_libraries
+    from xblockutils.resources import ResourceLoader
+
+    libraries = get_installed_libraries()
+    libraries['i18n'] = I18N_TEMPLATETAGS
+    engine = Engine(libraries=libraries)
+    return Template(ResourceLoader(__name__).load_unicode(template_path), engine=engine)
+
+
+def render_django_template(template_path, context=None, i18n_service=None):
+    """
+    Same as `ResourceLoader.render_django_template`, but with the compiled template cached.
+    """
+    from django.template import Context
+
+    context = dict(context or {})
+    context['_i18n_service'] = i18n_service
+    return get_template(template_path).render(Context(context))
@@ -0,0 +1,85 @@
+"""
+Versioned learner state updated with compare-and-set.
+
+Submissions and resets read the learner state with its version, decide on the new state and save it only if
+the version did not change in between, retrying on conflicts. Parallel requests of a learner (double clicks,
+retries, several tabs) are serialized this way, only one of them gets to count an attempt and publish a grade.
+
+The state is read and written through `TextHighlighterBlock.state_store`.
+
+The default `FieldDataStateStore` gives NO race protection: it compares the version in the fields of the block
+instance it has just loaded the state from, so its compare-and-set never fails. The LMS builds a block instance
+per request, so parallel requests are not serialized even within one process. The default still enforces the
+attempts limit and recognizes retried submission ids of requests that don't overlap. Deployments need a store
+with an atomic compare-and-set on shared storage, e.g. a database row updated with
+`WHERE version = <expected version>` (see `benchmarks/stores.py:SqliteStateStore` for an example).
+"""
+from __future__ import absolute_import
+
+import typing as t
+
+# user_state fields updated together by submissions and resets
+STATE_FIELDS = ('user_answers', 'draft_answers', 'attempts', 'last_submission_id')
+
+# reads of a state changed by a parallel request before giving up
+CAS_ATTEMPTS = 5
+
+
+class UserStateStore:
+    """
+    Storage of the versioned state of a learner in a block.
+    """
+
+    def load(self, block) -> t.Tuple[int, t.Dict[str, t.Any]]:
+        """
+        Returns the version and the `STATE_FIELDS` values of the learner state.
+        """
+        raise NotImplementedError
+
+    def compare_and_set(self, block, expected_version: int, fields: t.Dict[str, t.Any]) -> bool:
+        """
+        Saves the fields with the version `expected_version + 1` if the stored version is `expected_version`,
+        returns False otherwise. The fields of the block are set by `update_state`.
+        """
+        raise NotImplementedError
+
+
+class FieldDataStateStore(UserStateStore):
+    """
+    Keeps the state in the block `user_state` fields, the version in `state_version`.
+
+    No protection against parallel requests, see the module docstring. The block fields are the storage, so
+    compare-and-set has nothing to save besides what `update_state` sets on the block.
+    """
+
+    def load(self, block):
+        return block.state_version, {name: getattr(block, name) for name in STATE_FIELDS}
+
+    def compare_and_set(self, block, expected_version, fields):
+        return block.state_version == expected_version
+
+
+class StateConflict(Exception):
+    """
+    The learner state kept changing for `CAS_ATTEMPTS` reads.
+    """
+
+
+def update_state(store: UserStateStore, block, update: t.Callable[[t.Dict[str, t.Any]], t.Any]):
+    """
+    Applies `update(state)` to the learner state with compare-and-set, retrying on conflicts.
+
+    `update` returns `(new_fields, result)` to save the fields, or `(None, result)` to leave the state as is.
+    The fields are also set on the block. Returns the result of the call that was applied.
+    """
+    for _ in range(CAS_ATTEMPTS):
+        version, state = store.load(block)
+        fields, result = update(state)
+        if fields is None:
+            return result
+        if store.compare_and_set(block, version, fields):
+            for name, value in fields.items():
+                setattr(block, name, value)
+            block.state_version = version + 1
+            return result
+    raise StateConflict()
@@ -1,20 +1,27 @@
 from __future__ import absolute_import
 
+import hashlib
 import json
-import re
+import threading
 import typing as t
+from collections import Counter, OrderedDict
+from itertools import chain
 
 from xblock.core import XBlock
 from xblock.completable import XBlockCompletionMode
 from xblock.fields import Boolean, Float, Integer, List, Scope, String, Dict, Boolean
 from xblockutils.settings import XBlockWithSettingsMixin
-from xblockutils.resources import ResourceLoader
-from xmodule.graders import ShowCorrectness
-from web_fragments.fragment import Fragment
-from common.djangoapps.xblock_django.constants import ATTR_KEY_USER_IS_STAFF
 
-loader = ResourceLoader(__name__)
-RE_COMBINE_WHITESPACE = re.compile(r"\s+")
+from .assets import asset_path
+from .chunks import LARGE_TEXT_THRESHOLD, build_text_chunks, render_chunk_containers
+from .highlight import highlight_html
+from .instrumentation import NULL_TIMER, Timer, get_exporter, timed
+from .matching import AnswerMatcher, clean_matching_options
+from .rendering import render_django_template
+from .state import FieldDataStateStore, StateConflict, update_state
+from .tokens import (
+    RE_COMBINE_WHITESPACE, TOKEN_TEXT, build_token_index, find_tokens, render_tokenized_text, resolve_token_ids
+)
 
 _ = lambda text: text
 
@@ -26,19 +33,440 @@ class DummyTranslationService:
     gettext = _
 
 
-class AnswersStat:
+def cached_value_size(value) -> int:
+    """
+    Returns the rough size of a render cache value in characters: strings count their length, containers the
+    sizes of their items and other values one each.
+    """
+    if isinstance(value, str):
+        return len(value) or 1
+    if isinstance(value, dict):
+        return sum(cached_value_size(key) + cached_value_size(item) for key, item in value.items()) or 1
+    if isinstance(value, (list, tuple)):
+        return sum(cached_value_size(item) for item in value) or 1
+    return 1
+
+
+class RenderCache:
+    """
+    LRU cache of the settings-scoped part of the student view, bounded by the total size of the values
+    (see `cached_value_size`) rather than by their number: prepared passages and token indexes of large texts
+    can be megabytes each.
+
+    Entries are keyed by the block content version, so they are shared by all
+    learners and invalidated implicitly when the block is saved in Studio.
+    """
+
+    def __init__(self, max_size=16 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                pass
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = factory()
+        size = cached_value_size(value)
+        with self._lock:
+            if key in self._data:
+                self.size -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.size += size
+            # the value just added stays even if it's larger than the limit on its own
+            while self.size > self.max_size and len(self._data) > 1:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.size -= evicted_size
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._data),
+            'size': self.size,
+            'max_size': self.max_size,
+        }
+
+
+render_cache = RenderCache()
+
+
+class DefinitionRegistry:
+    """
+    Bounded set of the content versions whose block definition event was published by this process.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, content_version) -> bool:
+        """
+        Returns True if the version was not seen yet, i.e. its definition is to be published.
+        """
+        with self._lock:
+            if content_version in self._versions:
+                self._versions.move_to_end(content_version)
+                return False
+            self._versions[content_version] = True
+            while len(self._versions) > self.maxsize:
+                self._versions.popitem(last=False)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+published_definitions = DefinitionRegistry()
+
+# number of computed and of reused request-scoped values, keyed by "<name>.computed" and "<name>.reused"
+request_cache_stats = Counter()
+
+# answer statistics key of the answers that are not in the answer table
+OTHER_ANSWERS_KEY = '_other'
+
+EVENT_FORMAT_COMPACT = 'compact'
+EVENT_FORMAT_VERBOSE = 'verbose'
+
+# chunks of large texts rendered with the page and the most chunks returned by one `load_text_chunks` call
+INITIAL_TEXT_CHUNKS = 1
+TEXT_CHUNKS_PAGE_SIZE = 4
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode('utf-8')).hexdigest()
+
+
+def compute_content_version(settings: t.Dict[str, t.Any], text_digest: t.Optional[str] = None) -> str:
+    """
+    Returns a stable hash of the block settings used as a content version.
+
+    The text is hashed on its own rather than JSON encoded with the other settings, large texts are hashed
+    on every request (see `TextHighlighterBlock.get_content_version`). `text_digest` is its hash if known.
+    """
+    settings = dict(settings, text=text_digest or text_hash(settings.get('text')))
+    payload = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
 
-    def __init__(self, correct_answers: t.List[str], resp_answers: t.List[str], problem_weight=1,
-                 grading_type='all_or_nothing'):
-        self.correct_answers = correct_answers
-        self.correct_answers_total_num = len(correct_answers)
+def encode_answers(answers: t.List[str], answer_ids: t.Dict[str, int]) -> t.List[t.Union[int, str]]:
+    """
+    Replaces the answers found in the block answer table with their index, other answers are kept as text.
+    """
+    return [answer_ids.get(answer, answer) for answer in answers]
+
+
+def decode_answers(stored_answers: t.List[t.Union[int, str]], answer_table: t.List[str]) -> t.List[str]:
+    answers = []
+    for answer in stored_answers:
+        if isinstance(answer, int):
+            if 0 <= answer < len(answer_table):
+                answers.append(answer_table[answer])
+        else:
+            answers.append(answer)
+    return answers
+
+
+def extend_answer_table(answer_table: t.List[str], answers: t.Iterable[str]) -> t.List[str]:
+    """
+    Returns the answer table with the new answers appended.
+
+    Entries are never removed or reordered, so indices stored in learners' states stay valid after edits.
+    """
+    answer_table = list(answer_table)
+    known_answers = set(answer_table)
+    for answer in answers:
+        if answer and answer not in known_answers:
+            known_answers.add(answer)
+            answer_table.append(answer)
+    return answer_table
+
+
+def prepare_answers_list(answers_list_raw: t.List[str]) -> t.List[str]:
+    answers_list_res = []
+    for answer in answers_list_raw:
+        if answer:
+            answer_corrected = RE_COMBINE_WHITESPACE.sub(" ", answer).strip()
+            if answer_corrected:
+                answers_list_res.append(answer_corrected)
+    return sorted(list(set(answers_list_res)))
+
+
+def validate_editor_data(data: t.Dict[str, t.Any], gettext=_):
+    """
+    Validates the data posted by the Studio editor.
+
+    Returns `(content_settings, tokens, error)`: the cleaned settings keyed by field name, the tokens of the text
+    in tokenized mode (or None) and the error message if the data is invalid.
+    """
+    display_name = data.get('display_name')
+    if not display_name:
+        return None, None, gettext('Display Name is not set')
+
+    text = data.get('text')
+    if not text:
+        return None, None, gettext('Text is not set')
+
+    correct_answers = data.get('correct_answers', '')
+    correct_answers_list_tmp = correct_answers.split("\n")
+    correct_answers_list_res = prepare_answers_list(correct_answers_list_tmp)
+    if not correct_answers_list_res:
+        return None, None, gettext('Correct answers are not set')
+
+    description = data.get('description')
+    if description:
+        description = description.strip()
+
+    grading_type = data.get('grading_type')
+    if grading_type not in ['all_or_nothing', 'partial_credit', 'plus_minus']:
+        return None, None, gettext('Invalid grading type')
+
+    problem_weight = data.get('problem_weight')
+
+    if not problem_weight:
+        problem_weight = 1
+    try:
+        problem_weight = float(problem_weight)
+    except (ValueError, TypeError):
+        problem_weight = 1
+    if problem_weight < 1:
+        problem_weight = 1
+
+    display_correct_answers_after_response = data.get('display_correct_answers_after_response')
+    use_tokenized_system = data.get('use_tokenized_system')
+    non_limited_number_of_answers = data.get('non_limited_number_of_answers')
+    max_attempts_number = data.get('max_attempts_number')
+
+    try:
+        max_attempts_number = int(max_attempts_number)
+    except (ValueError, TypeError):
+        max_attempts_number = 1
+
+    answer_matching = data.get('answer_matching')
+    answer_matching = clean_matching_options(answer_matching if isinstance(answer_matching, dict) else None)
+
+    tokens = None
+    if use_tokenized_system:
+        if '<token>' not in text.lower():
+            return None, None, gettext('Please, use at least one "token" in text')
+        tokens = find_tokens(text)
+        token_answers = {token[TOKEN_TEXT] for token in tokens}
+        for ca in correct_answers_list_res:
+            if ca not in token_answers:
+                return None, None, 'Answer "%s" must be framed with "token" tag' % ca
+
+    content_settings = {
+        'display_name': display_name,
+        'description': description,
+        'text': text,
+        'use_tokenized_system': bool(use_tokenized_system),
+        'correct_answers': correct_answers_list_res,
+        'non_limited_number_of_answers': bool(non_limited_number_of_answers),
+        'grading_type': grading_type,
+        'weight': problem_weight,
+        'display_correct_answers_after_response': bool(display_correct_answers_after_response),
+        'max_attempts_number': max_attempts_number,
+        'answer_matching': answer_matching,
+    }
+    return content_settings, tokens, None
+
+
+def build_settings_fields(content_settings: t.Dict[str, t.Any], tokens: t.Optional[t.List[list]],
+                          answer_table: t.List[str]) -> t.Dict[str, t.Any]:
+    """
+    Returns all settings fields to save for validated editor data, including the derived ones.
+    """
+    fields = dict(content_settings)
+    correct_answers = content_settings['correct_answers']
+    fields['answer_table'] = extend_answer_table(
+        answer_table, chain(correct_answers, (token[TOKEN_TEXT] for token in tokens or []))
+    )
+    text_digest = text_hash(content_settings['text'])
+    fields['content_version'] = compute_content_version(content_settings, text_digest)
+    if content_settings['use_tokenized_system']:
+        fields['token_index'] = build_token_index(content_settings['text'], correct_answers, text_digest, tokens)
+    else:
+        fields['token_index'] = {}
+    fields['text_chunks'] = build_text_chunks(content_settings['text'], text_digest, tokens)
+    return fields
+
+
+def score_bucket(percent_completion) -> str:
+    return "%.1f" % round(percent_completion, 1)
+
+
+def bound_statistics_answers(answers: t.Iterable[str], known_answers: t.Container[str]) -> t.List[str]:
+    """
+    Returns the answer keys a learner's answers are counted under in the answer statistics.
+
+    Answers missing from `known_answers` (free text selections) share the `OTHER_ANSWERS_KEY` key, so the
+    statistics only grow with the block content, not with the number of learners.
+    """
+    return sorted({
+        answer if answer in known_answers or answer == OTHER_ANSWERS_KEY else OTHER_ANSWERS_KEY
+        for answer in answers
+    })
+
+
+def find_token_ids(answers: t.Iterable[str], token_index: t.Optional[t.Dict[str, t.Any]]) -> t.List[int]:
+    """
+    Returns the ids of the first tokens matching the answers, tokens being counted in the statistics by id.
+    """
+    if not token_index:
+        return []
+    token_ids = {}
+    for token_id, token in enumerate(token_index['tokens']):
+        token_ids.setdefault(token[TOKEN_TEXT], token_id)
+    return sorted(token_ids[answer] for answer in answers if answer in token_ids)
+
+
+def statistics_contribution(answers: t.Iterable[str], percent_completion, known_answers: t.Container[str],
+                            token_ids: t.List[int]) -> t.Dict[str, t.Any]:
+    """
+    Returns the contribution of a learner's answers to the answer statistics, see `apply_statistics_delta`.
+    """
+    return {
+        'answers': bound_statistics_answers(answers, known_answers),
+        'tokens': token_ids,
+        'score': score_bucket(percent_completion),
+    }
+
+
+def apply_statistics_delta(statistics: t.Dict[str, t.Any], contribution: t.Dict[str, t.Any], sign: int):
+    """
+    Adds (`sign=1`) or subtracts (`sign=-1`) one learner's contribution to the block answer statistics in place.
+
+    Counters that drop to zero are removed, so the statistics only hold answers that someone currently selected.
+    """
+    def update(counters, key):
+        value = counters.get(key, 0) + sign
+        if value > 0:
+            counters[key] = value
+        else:
+            counters.pop(key, None)
+
+    statistics['learners'] = max(statistics.get('learners', 0) + sign, 0)
+    for key in ('answers', 'tokens', 'scores'):
+        statistics.setdefault(key, {})
+    for answer in contribution.get('answers', []):
+        update(statistics['answers'], answer)
+    for token_id in contribution.get('tokens', []):
+        update(statistics['tokens'], str(token_id))
+    if contribution.get('score') is not None:
+        update(statistics['scores'], contribution['score'])
+    return statistics
+
+
+class AnswerKey:
+    """
+    Precomputed lookup structure for the correct answers of a block, reused across scoring calls.
+
+    `matching` holds the `answer_matching` options of the block, see the `matching` module.
+    """
+    __slots__ = ('answers', 'answer_ids', 'total_num', 'matcher')
+
+    def __init__(self, answers: t.Iterable[str], matching: t.Optional[t.Dict[str, t.Any]] = None):
+        self.answers = tuple(answers)
+        self.answer_ids = {answer: answer_id for answer_id, answer in enumerate(self.answers)}
+        self.total_num = len(self.answers)
+        self.matcher = AnswerMatcher(self.answers, matching)
+
+    def count_correct(self, resp_answers: t.Iterable[str]) -> int:
+        if self.matcher.exact:
+            answer_ids = self.answer_ids
+            return sum(1 for ans in resp_answers if ans in answer_ids)
+        # several answers matching the same correct answer count once
+        matched_ids = {self.matcher.match(ans) for ans in resp_answers}
+        matched_ids.discard(None)
+        return len(matched_ids)
+
+
+class AnswerKeyCache:
+    """
+    LRU cache of the compiled answer keys, bounded by their total size rather than by their number:
+    approximate matching keys hold an index much larger than the answers.
+    """
+
+    def __init__(self, max_size=1000000):
+        self.max_size = max_size
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, answers: t.Tuple[str, ...], matching_json: str) -> AnswerKey:
+        key = (answers, matching_json)
+        with self._lock:
+            answer_key = self._data.get(key)
+            if answer_key is not None:
+                self._data.move_to_end(key)
+                return answer_key
+        answer_key = AnswerKey(answers, json.loads(matching_json))
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = answer_key
+                self.size += answer_key.matcher.size
+            # the key just added stays even if it's larger than the limit on its own
+            while self.size > self.max_size and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= evicted.matcher.size
+        return answer_key
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+answer_key_cache = AnswerKeyCache()
+
+
+def get_answer_key(correct_answers: t.Union[AnswerKey, t.Iterable[str]],
+                   matching: t.Optional[t.Dict[str, t.Any]] = None) -> AnswerKey:
+    """
+    Returns the answer key of the correct answers, compiled once per answers and matching options.
+    """
+    if isinstance(correct_answers, AnswerKey):
+        return correct_answers
+    return answer_key_cache.get_or_create(tuple(correct_answers),
+                                          json.dumps(clean_matching_options(matching), sort_keys=True))
+
+
+class AnswersStat:
+    __slots__ = ('correct_answers', 'correct_answers_total_num', 'resp_answers', 'grading_type', 'problem_weight',
+                 'user_correct_answers_num', 'percent_completion', 'weighted_percent_completion')
+
+    def __init__(self, correct_answers: t.Union[AnswerKey, t.List[str]], resp_answers: t.List[str], problem_weight=1,
+                 grading_type='all_or_nothing', matching: t.Optional[t.Dict[str, t.Any]] = None):
+        answer_key = get_answer_key(correct_answers, matching)
+        self.correct_answers = list(answer_key.answers) if isinstance(correct_answers, AnswerKey) else correct_answers
+        self.correct_answers_total_num = answer_key.total_num
         self.resp_answers = resp_answers
         self.grading_type = grading_type
         self.problem_weight = problem_weight if problem_weight and problem_weight >= 1 else 1
         self.user_correct_answers_num = 0
         self.percent_completion = 0
         self.weighted_percent_completion = 0
-        self.user_correct_answers_num = sum([1 for ans in self.resp_answers if ans in self.correct_answers])
+        self.user_correct_answers_num = answer_key.count_correct(self.resp_answers)
 
         if self.user_correct_answers_num > self.correct_answers_total_num:
             self.user_correct_answers_num = self.correct_answers_total_num
@@ -59,6 +487,16 @@ class AnswersStat:
                 self.percent_completion = float(self.user_correct_answers_num) / self.correct_answers_total_num
                 self.weighted_percent_completion = self.percent_completion * self.problem_weight
 
+    @classmethod
+    def batch(cls, correct_answers: t.Union[AnswerKey, t.List[str]], responses: t.Iterable[t.List[str]],
+              problem_weight=1, grading_type='all_or_nothing',
+              matching: t.Optional[t.Dict[str, t.Any]] = None) -> t.List['AnswersStat']:
+        """
+        Scores many responses against one answer key, building the key only once.
+        """
+        answer_key = get_answer_key(correct_answers, matching)
+        return [cls(answer_key, resp_answers, problem_weight, grading_type) for resp_answers in responses]
+
     def to_dict(self):
         return {
             'correct_answers': self.correct_answers,
@@ -113,7 +551,31 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
     user_answers = List(
         default=None,
         scope=Scope.user_state,
-        help=_("User answers")
+        help=_("User answers, as indices into the answer table or as text for answers missing from it")
+    )
+
+    draft_answers = List(
+        default=[],
+        scope=Scope.user_state,
+        help=_("Answers selected but not submitted yet, stored like the user answers")
+    )
+
+    last_submission_id = String(
+        default=None,
+        scope=Scope.user_state,
+        help=_("Client generated id of the last processed submission, used to ignore retries")
+    )
+
+    state_version = Integer(
+        default=0,
+        scope=Scope.user_state,
+        help=_("Version of the learner state, incremented by every submission and reset")
+    )
+
+    answer_table = List(
+        default=[],
+        scope=Scope.settings,
+        help=_("Append-only table of the correct answers and tokens referred to by learners' answers")
     )
 
     non_limited_number_of_answers = Boolean(
@@ -157,7 +619,51 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
         values={"min": 0, "step": 1}
     )
 
+    answer_matching = Dict(
+        display_name=_("Answer Matching"),
+        help=_("Options of the matching of learners' answers with the correct answers: ignore_case, "
+               "trim_punctuation, normalize_unicode and max_edits"),
+        scope=Scope.settings,
+        default={},
+    )
+
+    answer_statistics = Dict(
+        default={},
+        scope=Scope.user_state_summary,
+        help=_("Number of learners per selected answer, token and score, updated on every submission")
+    )
+
+    statistics_contribution = Dict(
+        default={},
+        scope=Scope.user_state,
+        help=_("Answers, tokens and score of the learner counted in the answer statistics")
+    )
+
+    content_version = String(
+        default="",
+        scope=Scope.settings,
+        help=_("Hash of the block content, updated on every save")
+    )
+
+    token_index = Dict(
+        default={},
+        scope=Scope.settings,
+        help=_("Index of the tokens in the text, built on save")
+    )
+
+    text_chunks = Dict(
+        default={},
+        scope=Scope.settings,
+        help=_("Offsets of the chunks large texts are rendered in, built on save")
+    )
+
     block_settings_key = 'text-highlighter'
+    # callable(block, event_type, data) receiving the published events instead of runtime.publish,
+    # set it on the instance or wrap it in staticmethod()
+    publish_sink = None
+    # `state.UserStateStore` the submissions and resets update the learner state through, the default one gives
+    # no protection against parallel requests, see the `state` module
+    state_store = FieldDataStateStore()
     has_score = True
     has_author_view = True
     completion_mode = XBlockCompletionMode.COMPLETABLE
@@ -173,28 +679,197 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
         """
         return 1.0
 
+    def _request_cached(self, name, factory, counted=True):
+        """
+        Returns the value computed by `factory` once per block instance and learner, i.e. once per request.
+
+        Values are keyed by the learner the block is bound to, as an instance can be bound to another learner
+        (`bind_for_student` in grading tasks, masquerading). `counted=False` leaves the value out of
+        `request_cache_stats`, for values that don't save service calls.
+        """
+        request_cache = self.__dict__.setdefault('_request_cache', {})
+        key = (self.scope_ids.user_id, name)
+        try:
+            value = request_cache[key]
+        except KeyError:
+            if counted:
+                request_cache_stats[name + '.computed'] += 1
+            value = request_cache[key] = factory()
+        else:
+            if counted:
+                request_cache_stats[name + '.reused'] += 1
+        return value
+
+    def _invalidate_request_cache(self):
+        """
+        Drops the request-scoped values, handlers call it before using or after changing the block state.
+        """
+        self.__dict__.pop('_request_cache', None)
+
     @property
     def i18n_service(self):
         """ Obtains translation service """
-        i18n_service = self.runtime.service(self, "i18n")
-        if i18n_service:
-            return i18n_service
-        else:
-            return DummyTranslationService()
+        def get_service():
+            i18n_service = self.runtime.service(self, "i18n")
+            if i18n_service:
+                return i18n_service
+            else:
+                return DummyTranslationService()
+        return self._request_cached('i18n_service', get_service)
+
+    def _timer(self, name):
+        """
+        Returns a context manager timing the named phase when instrumentation is enabled in the block settings.
+        """
+        exporter = self._request_cached('timing_exporter', lambda: get_exporter(
+            (self.get_xblock_settings(default={}) or {}).get('instrumentation')
+        ), counted=False)
+        if exporter is None:
+            return NULL_TIMER
+        return Timer(exporter, name)
+
+    def get_current_user(self):
+        return self._request_cached('current_user', lambda: self.runtime.service(self, 'user').get_current_user())
+
+    def user_is_staff(self):
+        from common.djangoapps.xblock_django.constants import ATTR_KEY_USER_IS_STAFF
+
+        return self.get_current_user().opt_attrs.get(ATTR_KEY_USER_IS_STAFF)
+
+    def get_text_hash(self, text=None):
+        """
+        Returns the hash of the current text, computed once per block instance.
+
+        Pass the text if it was just read, reading the field sanitizes the whole text again.
+        """
+        if text is None:
+            text = self.text
+        cached = self.__dict__.get('_text_hash')
+        if cached is None or cached[0] is not text:
+            cached = self.__dict__['_text_hash'] = (text, text_hash(text))
+        return cached[1]
+
+    def get_token_index(self):
+        """
+        Returns the token index of the current text in tokenized mode, or None.
+
+        The index saved by `update_editor_context` is used if it was built from the current text, otherwise
+        (text changed through OLX or an import, block saved before indexes existed) one is built and cached.
+        """
+        if not self.use_tokenized_system:
+            return None
+        text_digest = self.get_text_hash()
+        if self.token_index and self.token_index.get('text_hash') == text_digest:
+            return self.token_index
+        correct_answers = self.correct_answers or []
+        return render_cache.get_or_create(
+            ('token_index', text_digest, tuple(correct_answers)),
+            lambda: build_token_index(self.text, correct_answers, text_digest)
+        )
+
+    def get_text_chunks(self):
+        """
+        Returns the `[start, end, first_token_id]` chunks of the current text, or None if the text is rendered
+        at once.
+
+        Like the token index, chunks saved for another text are built again and cached.
+        """
+        text_digest = self.get_text_hash()
+        text_chunks = self.text_chunks
+        if not text_chunks or text_chunks.get('text_hash') != text_digest:
+            if len(self.text or "") < LARGE_TEXT_THRESHOLD:
+                return None
+            token_index = self.get_token_index()
+            text_chunks = render_cache.get_or_create(
+                ('text_chunks', text_digest),
+                lambda: build_text_chunks(self.text, text_digest, token_index['tokens'] if token_index else None)
+            )
+        return text_chunks['chunks'] if text_chunks else None
+
+    def _render_text_chunk(self, chunk_id):
+        def build():
+            start, end, first_token_id = self.get_text_chunks()[chunk_id]
+            if self.use_tokenized_system:
+                return render_tokenized_text(self.text, self.get_token_index(), start, end, first_token_id)
+            return self.text[start:end]
+        return render_cache.get_or_create((self.get_content_version(), 'text_chunk', chunk_id), build)
+
+    def _render_user_text_chunk(self, chunk_id, highlighted_texts):
+        chunk = self._render_text_chunk(chunk_id)
+        if highlighted_texts and not self.use_tokenized_system:
+            chunk = highlight_html(chunk, highlighted_texts)
+        return chunk
 
     def _prepare_text(self, text):
         if self.use_tokenized_system:
-            return text.replace('<token>', '<span class="th-cl-token">').replace('</token>', '</span>')
+            return render_tokenized_text(text, self.get_token_index())
         return text
 
+    def _content_settings(self):
+        return {
+            'display_name': self.display_name,
+            'description': self.description,
+            'text': self.text,
+            'use_tokenized_system': self.use_tokenized_system,
+            'correct_answers': self.correct_answers,
+            'non_limited_number_of_answers': self.non_limited_number_of_answers,
+            'grading_type': self.grading_type,
+            'weight': self.weight,
+            'display_correct_answers_after_response': self.display_correct_answers_after_response,
+            'max_attempts_number': self.max_attempts_number,
+            'answer_matching': self.answer_matching,
+        }
+
+    def get_content_version(self):
+        """
+        Returns the content version of the current field values, computed once per block instance.
+
+        The stored `content_version` is only updated by `update_editor_context`, while renames in Studio,
+        OLX edits and course imports change the fields directly, so it can't be trusted as a cache key.
+        The version is computed again if the fields change after the first call.
+        """
+        content_settings = self._content_settings()
+        cached = self.__dict__.get('_content_version')
+        if cached is None or cached[0] != content_settings:
+            version = compute_content_version(content_settings, self.get_text_hash(content_settings['text']))
+            cached = self.__dict__['_content_version'] = (content_settings, version)
+        return cached[1]
+
+    def _get_static_context(self):
+        """
+        Settings-scoped part of the student view context, shared by all learners.
+        """
+        def build():
+            correct_answers = self.correct_answers or []
+            prepared_text = None
+            # chunked texts are rendered chunk by chunk, see `_render_text_chunk`
+            if self.get_text_chunks() is None:
+                with self._timer('student_view.prepare_text'):
+                    prepared_text = self._prepare_text(self.text)
+            return {
+                'display_name': self.display_name,
+                'text': prepared_text,
+                'correct_answers_texts': ", ".join(correct_answers) if correct_answers else "",
+                'correct_answers_num': len(correct_answers),
+                'description': self.description,
+                'use_tokenized_system': self.use_tokenized_system,
+                'non_limited_number_of_answers': self.non_limited_number_of_answers,
+                'max_attempts_number': self.max_attempts_number,
+            }
+        return render_cache.get_or_create(self.get_content_version(), build)
+
     def _create_fragment(self, template, js_url=None, initialize_js_func=None):
+        from web_fragments.fragment import Fragment
+
         fragment = Fragment()
         fragment.add_content(template)
         if initialize_js_func:
             fragment.initialize_js(initialize_js_func, {})
+        # the bundle urls only depend on the block type, so a page with many blocks includes them once
+        # (fragments merged into a page keep unique resources only)
         if js_url:
-            fragment.add_javascript_url(self.runtime.local_resource_url(self, js_url))
-        fragment.add_css_url(self.runtime.local_resource_url(self, 'public/css/th_block.css'))
+            fragment.add_javascript_url(self.runtime.local_resource_url(self, asset_path(js_url)))
+        fragment.add_css_url(self.runtime.local_resource_url(self, asset_path('public/css/th_block.css')))
         return fragment
 
     def get_real_user(self):
@@ -208,14 +883,18 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
 
         Limits access to the correct/incorrect flags, messages, and problem score.
         """
-        if not self.display_correct_answers_after_response:
-            return False
-        user_is_staff = self.runtime.service(self, 'user').get_current_user().opt_attrs.get(ATTR_KEY_USER_IS_STAFF)
-        return ShowCorrectness.correctness_available(
-            show_correctness=self.show_correctness,
-            due_date=self.close_date,
-            has_staff_access=user_is_staff,
-        )
+        def get_correctness_available():
+            from xmodule.graders import ShowCorrectness
+
+            if not self.display_correct_answers_after_response:
+                return False
+            user_is_staff = self.user_is_staff()
+            return ShowCorrectness.correctness_available(
+                show_correctness=self.show_correctness,
+                due_date=self.close_date,
+                has_staff_access=user_is_staff,
+            )
+        return self._request_cached('correctness_available', get_correctness_available)
 
     def get_grade_text(self, ans_stat: AnswersStat, correctness_available=True):
         if ans_stat.correct_answers_total_num == 0:
@@ -239,28 +918,47 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
         return selected_texts and (ans_stat.percent_completion < 1.0 or not self.correctness_available()) \
             and (self.max_attempts_number == 0 or attempts < self.max_attempts_number)
 
+    @timed('student_view.total')
     def student_view(self, context=None):
         is_studio_view = True if context and context.get("studio_view", False) else False
         correct_answers = self.correct_answers
-        selected_texts = sorted(self.user_answers) if self.user_answers else []
+        selected_texts = sorted(self.get_user_answers())
         correctness_available = self.correctness_available()
-        ans_stat = AnswersStat(correct_answers, selected_texts, self.weight, self.grading_type)
+        with self._timer('student_view.answers_stat'):
+            ans_stat = AnswersStat(correct_answers, selected_texts, self.weight, self.grading_type,
+                                   self.answer_matching)
         attempts = 0
         if self.attempts > 0:
             attempts = self.attempts
         # backward compatibility for the case if self.attempts == 0 but answer was saved
-        elif self.user_answers:
+        elif selected_texts:
             attempts = 1
 
-        context_dict = {
-            'display_name': self.display_name,
-            'text': self._prepare_text(self.text),
+        draft_texts = []
+        if not selected_texts and not is_studio_view:
+            draft_texts = self._get_draft_texts()
+
+        context_dict = dict(self._get_static_context())
+        highlighted_texts = selected_texts or draft_texts
+        text_chunks = self.get_text_chunks()
+        if text_chunks is not None:
+            # the first chunks come with the page, the client loads the others through `load_text_chunks`
+            rendered_chunks_num = len(text_chunks) if is_studio_view else INITIAL_TEXT_CHUNKS
+            with self._timer('student_view.highlight'):
+                context_dict['text'] = render_chunk_containers([
+                    self._render_user_text_chunk(chunk_id, [] if is_studio_view else highlighted_texts)
+                    if chunk_id < rendered_chunks_num else None
+                    for chunk_id in range(len(text_chunks))
+                ])
+            context_dict['text_chunks_total'] = len(text_chunks)
+        elif highlighted_texts and not is_studio_view and not self.use_tokenized_system:
+            with self._timer('student_view.highlight'):
+                context_dict['text'] = highlight_html(context_dict['text'], highlighted_texts)
+        context_dict.update({
             'selected_texts': ", ".join(selected_texts) if selected_texts and not is_studio_view else "",
             'selected_texts_json': json.dumps(selected_texts) if selected_texts and not is_studio_view else "",
-            'correct_answers_texts': ", ".join(correct_answers)if correct_answers else "",
+            'draft_texts_json': json.dumps(draft_texts) if draft_texts else "",
             'is_studio_view': is_studio_view,
-            'correct_answers_num': len(correct_answers),
-            'description': self.description,
             'percent_completion': ans_stat.percent_completion,
             'weighted_percent_completion': ans_stat.weighted_percent_completion,
             'user_correct_answers_num': ans_stat.user_correct_answers_num,
@@ -269,21 +967,20 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
             'graded': self.graded,
             'grade_text': self.get_grade_text(ans_stat, correctness_available),
             'correctness_available': correctness_available,
-            'use_tokenized_system': self.use_tokenized_system,
-            'non_limited_number_of_answers': self.non_limited_number_of_answers,
             'attempts': attempts,
-            'max_attempts_number': self.max_attempts_number,
             'attempts_text': self.get_attempts_text(attempts),
             'display_reset_button': self.should_display_reset_button(selected_texts, ans_stat, attempts)
-        }
-        template = loader.render_django_template("/templates/public.html", context=context_dict,
-                                                 i18n_service=self.i18n_service)
+        })
+        with self._timer('student_view.render'):
+            template = render_django_template("/templates/public.html", context=context_dict,
+                                              i18n_service=self.i18n_service)
         return self._create_fragment(template, js_url='public/js/th_public.js',
                                      initialize_js_func='TextHighlighterBlock')
 
     def author_view(self, context=None):
         return self.student_view({"studio_view": True})
 
+    @timed('studio_view.total')
     def studio_view(self, context=None):
         context_dict = {
             'display_name': self.display_name,
@@ -296,113 +993,172 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
             'non_limited_number_of_answers': self.non_limited_number_of_answers,
             'display_correct_answers_after_response': self.display_correct_answers_after_response,
             'max_attempts_number': self.max_attempts_number,
+            'answer_matching': clean_matching_options(self.answer_matching),
         }
-        template = loader.render_django_template("/templates/staff.html", context=context_dict,
-                                                 i18n_service=self.i18n_service)
+        template = render_django_template("/templates/staff.html", context=context_dict,
+                                          i18n_service=self.i18n_service)
         return self._create_fragment(template, js_url='public/js/th_staff.js',
                                      initialize_js_func='TextHighlighterEditBlock')
 
+    def _get_draft_texts(self) -> t.List[str]:
+        if not self.draft_answers:
+            return []
+        return sorted(decode_answers(self.draft_answers, self.answer_table))
+
+    def _answer_ids(self):
+        # keyed by the table itself, blocks with the same content can have different tables (e.g. after edits)
+        answer_table = tuple(self.answer_table)
+        return render_cache.get_or_create(
+            ('answer_ids', answer_table),
+            lambda: {answer: answer_id for answer_id, answer in enumerate(answer_table)}
+        )
+
+    def get_user_answers(self) -> t.List[str]:
+        """
+        Returns the decoded answers of the learner.
+
+        Answers stored as text before the answer table existed are re-encoded on first read.
+        """
+        stored_answers = self.user_answers
+        if not stored_answers:
+            return []
+        if self.answer_table and any(isinstance(answer, str) for answer in stored_answers):
+            answer_ids = self._answer_ids()
+            if any(answer in answer_ids for answer in stored_answers if isinstance(answer, str)):
+                self.user_answers = encode_answers(decode_answers(stored_answers, self.answer_table), answer_ids)
+        return decode_answers(stored_answers, self.answer_table)
+
+    def _encode_user_answers(self, answers: t.List[str]) -> t.List[t.Union[int, str]]:
+        return encode_answers(answers, self._answer_ids()) if self.answer_table else list(answers)
+
+    def set_user_answers(self, answers: t.List[str]):
+        self.user_answers = self._encode_user_answers(answers)
+
     def _prepare_answers_list(self, answers_list_raw: t.List[str]) -> t.List[str]:
-        answers_list_res = []
-        for answer in answers_list_raw:
-            if answer:
-                answer_corrected = RE_COMBINE_WHITESPACE.sub(" ", answer).strip()
-                if answer_corrected:
-                    answers_list_res.append(answer_corrected)
-        return sorted(list(set(answers_list_res)))
+        return prepare_answers_list(answers_list_raw)
 
     @XBlock.json_handler
+    @timed('update_editor_context.total')
     def update_editor_context(self, data, suffix=''):  # pylint: disable=unused-argument
-        from bs4 import BeautifulSoup
-
-        display_name = data.get('display_name')
-        if not display_name:
+        with self._timer('update_editor_context.validate'):
+            content_settings, tokens, error = validate_editor_data(data, self.i18n_service.gettext)
+        if error:
             return {
                 'result': 'error',
-                'msg': self.i18n_service.gettext('Display Name is not set')
+                'msg': error
             }
 
-        text = data.get('text')
-        if not text:
-            return {
-                'result': 'error',
-                'msg': self.i18n_service.gettext('Text is not set')
-            }
+        with self._timer('update_editor_context.build_settings'):
+            settings_fields = build_settings_fields(content_settings, tokens, self.answer_table)
+        for name, value in settings_fields.items():
+            setattr(self, name, value)
+        self._invalidate_request_cache()
 
-        correct_answers = data.get('correct_answers', '')
-        correct_answers_list_tmp = correct_answers.split("\n")
-        correct_answers_list_res = self._prepare_answers_list(correct_answers_list_tmp)
-        if not correct_answers_list_res:
-            return {
-                'result': 'error',
-                'msg': self.i18n_service.gettext('Correct answers are not set')
-            }
+        return {
+            'result': 'success'
+        }
 
-        description = data.get('description')
-        if description:
-            description = description.strip()
+    def _publish(self, event_type, data):
+        sink = self.publish_sink or self.runtime.publish
+        sink(self, event_type, data)
 
-        grading_type = data.get('grading_type')
-        if grading_type not in ['all_or_nothing', 'partial_credit', 'plus_minus']:
-            return {
-                'result': 'error',
-                'msg': self.i18n_service.gettext('Invalid grading type')
-            }
+    def get_event_format(self):
+        """
+        Returns the format of the submission events configured under `block_settings_key`, verbose by default.
+        """
+        xblock_settings = self.get_xblock_settings(default={}) or {}
+        return xblock_settings.get('event_format', EVENT_FORMAT_VERBOSE)
 
-        problem_weight = data.get('problem_weight')
+    def _publish_submission_event(self, event_type, data, ans_stat, correctness_available):
+        """
+        Publishes a submission or reset event, compact events are preceded by the block definition event the
+        first time this process publishes one for the content version.
 
-        if not problem_weight:
-            problem_weight = 1
-        try:
-            problem_weight = float(problem_weight)
-        except (ValueError, TypeError):
-            problem_weight = 1
-        if problem_weight < 1:
-            problem_weight = 1
+        The definition is published from the LMS handlers rather than on save, the Studio runtime doesn't
+        track events.
+        """
+        event_data = self._build_event_data(data, ans_stat, correctness_available)
+        if self.get_event_format() == EVENT_FORMAT_COMPACT and published_definitions.add(event_data['content_version']):
+            definition = dict(self._content_settings(), content_version=event_data['content_version'])
+            self._publish('xblock.text-highlighter.block_definition', definition)
+        self._publish(event_type, event_data)
+
+    def _build_event_data(self, data, ans_stat, correctness_available):
+        data['user_id'] = self.scope_ids.user_id
+        data['user_answers'] = self.get_user_answers()
+        data['new_attempt'] = True
+        data['percent_completion'] = float(round(ans_stat.percent_completion, 2))
+        data['weighted_percent_completion'] = float(round(ans_stat.weighted_percent_completion, 2))
+        data['max_grade'] = 1
+        data['weight'] = self.weight
+        data['grading_type'] = self.grading_type
+        data['correctness_available'] = correctness_available
+        data['attempts'] = self.attempts
+        data['max_attempts_number'] = self.max_attempts_number
+        data['content_version'] = self.get_content_version()
+        if self.get_event_format() == EVENT_FORMAT_VERBOSE:
+            data['display_name'] = self.display_name
+            data['description'] = self.description
+            data['text'] = self.text
+            data['correct_answers'] = self.correct_answers
+        return data
 
-        display_correct_answers_after_response = data.get('display_correct_answers_after_response')
-        use_tokenized_system = data.get('use_tokenized_system')
-        non_limited_number_of_answers = data.get('non_limited_number_of_answers')
-        max_attempts_number = data.get('max_attempts_number')
+    def _find_token_ids(self, answers):
+        return find_token_ids(answers, self.get_token_index())
 
-        try:
-            max_attempts_number = int(max_attempts_number)
-        except (ValueError, TypeError):
-            max_attempts_number = 1
-
-        if use_tokenized_system:
-            if '<token>' not in text.lower():
-                return {
-                    'result': 'error',
-                    'msg': self.i18n_service.gettext('Please, use at least one "token" in text')
-                }
-            html_block = BeautifulSoup(text)
-            tokens = html_block.find_all('token')
-            token_answers = [token.string.strip() for token in tokens]
-            for ca in correct_answers_list_res:
-                if ca not in token_answers:
-                    return {
-                        'result': 'error',
-                        'msg': 'Answer "%s" must be framed with "token" tag' % ca
-                    }
-
-        self.display_name = display_name
-        self.text = text
-        self.correct_answers = correct_answers_list_res
-        self.description = description
-        self.grading_type = grading_type
-        self.weight = problem_weight
-        self.display_correct_answers_after_response = bool(display_correct_answers_after_response)
-        self.use_tokenized_system = bool(use_tokenized_system)
-        self.non_limited_number_of_answers = bool(non_limited_number_of_answers)
-        self.max_attempts_number = max_attempts_number
+    def _statistics_answer_keys(self):
+        return self._answer_ids() if self.answer_table else set(self.correct_answers or [])
+
+    def get_statistics_contribution(self, answers, percent_completion, token_ids=None):
+        """
+        Returns the contribution of a learner's answers to the answer statistics.
+
+        Tokens are counted by the given ids, by default by the first token matching each answer.
+        """
+        if token_ids is None:
+            token_ids = self._find_token_ids(answers)
+        return statistics_contribution(answers, percent_completion, self._statistics_answer_keys(), token_ids)
+
+    def _update_answer_statistics(self, contribution):
+        """
+        Replaces the learner's previous contribution to the answer statistics with the new one.
+
+        Only the delta is applied, so the cost doesn't depend on the number of learners. Contributions saved
+        before answers were bounded are bounded before they are subtracted. The statistics are shared by all
+        learners and concurrent submissions can make them drift, see `regrade.recompute_statistics`.
+        """
+        statistics = self.answer_statistics
+        if self.statistics_contribution:
+            previous = dict(self.statistics_contribution)
+            previous['answers'] = bound_statistics_answers(previous.get('answers', []), self._statistics_answer_keys())
+            apply_statistics_delta(statistics, previous, -1)
+        if contribution:
+            apply_statistics_delta(statistics, contribution, 1)
+        self.answer_statistics = statistics
+        self.statistics_contribution = contribution
 
+    @XBlock.json_handler
+    def answer_statistics_data(self, data, suffix=''):  # pylint: disable=unused-argument
+        """
+        Returns the aggregated answer statistics of the block to course staff.
+        """
+        if not self.user_is_staff():
+            return {'result': 'error', 'message': "Access denied"}
+        statistics = self.answer_statistics
         return {
-            'result': 'success'
+            'result': 'success',
+            'learners': statistics.get('learners', 0),
+            'answers': statistics.get('answers', {}),
+            'tokens': statistics.get('tokens', {}),
+            'scores': statistics.get('scores', {}),
         }
 
     @XBlock.json_handler
+    @timed('publish_answers.total')
     def publish_answers(self, data, suffix=''):
+        self._invalidate_request_cache()
+        submission_id = data.pop('submission_id', None)
+        token_ids = data.pop('token_ids', None)
         try:
             resp_answers_raw = data.pop('answers')
         except KeyError:
@@ -411,45 +1167,70 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
         if not isinstance(resp_answers_raw, list):
             return {'result': 'error', 'message': "Invalid answers format"}
 
-        resp_answers = self._prepare_answers_list(resp_answers_raw)
+        token_index = self.get_token_index() if token_ids is not None else None
+        if token_index:
+            if not isinstance(token_ids, list):
+                return {'result': 'error', 'message': "Invalid answers format"}
+            resp_answers = resolve_token_ids(token_ids, token_index)
+            if resp_answers is None:
+                return {'result': 'error', 'message': "Invalid answers format"}
+            resp_token_ids = sorted(set(token_ids))
+        else:
+            with self._timer('publish_answers.prepare_answers'):
+                resp_answers = self._prepare_answers_list(resp_answers_raw)
+            resp_token_ids = self._find_token_ids(resp_answers)
         correct_answers = self.correct_answers
         correctness_available = self.correctness_available()
 
-        ans_stat = AnswersStat(correct_answers, resp_answers, self.weight, self.grading_type)
+        def submit(state):
+            if submission_id and submission_id == state['last_submission_id']:
+                # retry of a submission that was already processed
+                return None, {'saved_answers': decode_answers(state['user_answers'] or [], self.answer_table)}
+            if state['user_answers']:
+                return None, {'message': "Answers are already submitted"}
+            if 0 < self.max_attempts_number <= state['attempts']:
+                return None, {'message': "No attempts left"}
+            return {
+                'user_answers': self._encode_user_answers(resp_answers),
+                'draft_answers': [],
+                'attempts': state['attempts'] + 1,
+                'last_submission_id': submission_id,
+            }, {}
 
-        # backward compatibility for the case if self.attempts == 0 but answer was saved
-        if self.user_answers and self.attempts == 0:
-            self.attempts = 1
-        self.attempts = self.attempts + 1
-        self.user_answers = resp_answers
-
-        self.runtime.publish(self, 'progress', {})
-        self.runtime.publish(self, 'grade', {
-            'value': ans_stat.percent_completion,
-            'max_value': 1,
-        })
+        try:
+            with self._timer('publish_answers.save_state'):
+                outcome = update_state(self.state_store, self, submit)
+        except StateConflict:
+            outcome = {'message': "Please, try again"}
+        if 'saved_answers' in outcome:
+            resp_answers = outcome['saved_answers']
+            ans_stat = AnswersStat(correct_answers, resp_answers, self.weight, self.grading_type,
+                                   self.answer_matching)
+            return self._submission_response(resp_answers, ans_stat, correctness_available)
+        if 'message' in outcome:
+            return {'result': 'error', 'message': outcome['message']}
+
+        with self._timer('publish_answers.answers_stat'):
+            ans_stat = AnswersStat(correct_answers, resp_answers, self.weight, self.grading_type,
+                                   self.answer_matching)
+
+        self._update_answer_statistics(
+            self.get_statistics_contribution(resp_answers, ans_stat.percent_completion, resp_token_ids)
+        )
 
         event_type = 'xblock.text-highlighter.new_submission'
-        data['user_id'] = self.scope_ids.user_id
-        data['correct_answers'] = correct_answers
-        data['user_answers'] = resp_answers
-        data['new_attempt'] = True
-        data['percent_completion'] = float(round(ans_stat.percent_completion, 2))
-        data['weighted_percent_completion'] = float(round(ans_stat.weighted_percent_completion, 2))
-        data['max_grade'] = 1
-        data['weight'] = self.weight
-        data['grading_type'] = self.grading_type
-        data['display_name'] = self.display_name
-        data['description'] = self.description
-        data['text'] = self.text
-        data['correct_answers'] = self.correct_answers
-        data['user_answers'] = self.user_answers
-        data['correctness_available'] = correctness_available
-        data['attempts'] = self.attempts
-        data['max_attempts_number'] = self.max_attempts_number
+        with self._timer('publish_answers.publish'):
+            self._publish('progress', {})
+            self._publish('grade', {
+                'value': ans_stat.percent_completion,
+                'max_value': 1,
+            })
+            self._publish_submission_event(event_type, data, ans_stat, correctness_available)
 
-        self.runtime.publish(self, event_type, data)
+        return self._submission_response(resp_answers, ans_stat, correctness_available)
 
+    def _submission_response(self, resp_answers, ans_stat, correctness_available):
+        correct_answers = self.correct_answers
         return {
             'result': 'success',
             'selected_texts': ", ".join(resp_answers) if resp_answers else "",
@@ -468,41 +1249,83 @@ class TextHighlighterBlock(XBlockWithSettingsMixin, XBlock):
         }
 
     @XBlock.json_handler
+    @timed('load_text_chunks.total')
+    def load_text_chunks(self, data, suffix=''):  # pylint: disable=unused-argument
+        """
+        Returns a page of the chunks of a large text, with the highlights of the learner's answers.
+
+        `highlighted_texts` are the answers the `th-<index>` highlight classes refer to.
+        """
+        text_chunks = self.get_text_chunks()
+        if text_chunks is None:
+            return {'result': 'error', 'message': "The text is not chunked"}
+        try:
+            start = int(data.get('start', 0))
+            count = min(int(data.get('count', TEXT_CHUNKS_PAGE_SIZE)), TEXT_CHUNKS_PAGE_SIZE)
+        except (ValueError, TypeError):
+            return {'result': 'error', 'message': "Invalid chunks range"}
+        if start < 0 or count < 1:
+            return {'result': 'error', 'message': "Invalid chunks range"}
+
+        highlighted_texts = sorted(self.get_user_answers()) or self._get_draft_texts()
+        return {
+            'result': 'success',
+            'chunks': [
+                {'index': chunk_id, 'html': self._render_user_text_chunk(chunk_id, highlighted_texts)}
+                for chunk_id in range(start, min(start + count, len(text_chunks)))
+            ],
+            'total': len(text_chunks),
+            'highlighted_texts': highlighted_texts,
+        }
+
+    @XBlock.json_handler
+    def save_draft(self, data, suffix=''):  # pylint: disable=unused-argument
+        """
+        Saves the answers selected but not submitted yet, the client batches selection changes into one call.
+        """
+        answers = data.get('answers')
+        if not isinstance(answers, list) or not all(isinstance(answer, str) for answer in answers):
+            return {'result': 'error', 'message': "Invalid answers format"}
+        if self.user_answers:
+            return {'result': 'error', 'message': "Answers are already submitted"}
+        self.draft_answers = self._encode_user_answers(self._prepare_answers_list(answers))
+        return {'result': 'success'}
+
+    @XBlock.json_handler
+    @timed('reset_answers.total')
     def reset_answers(self, data, suffix=''):
+        self._invalidate_request_cache()
         correct_answers = self.correct_answers
         correctness_available = self.correctness_available()
-        ans_stat = AnswersStat(correct_answers, [], self.weight, self.grading_type)
-
-        # backward compatibility for the case if self.attempts == 0 but answer was saved
-        if self.user_answers and self.attempts == 0:
-            self.attempts = 1
-        self.user_answers = []
-        self.runtime.publish(self, 'progress', {})
-        self.runtime.publish(self, 'grade', {
-            'value': ans_stat.percent_completion,
-            'max_value': 1,
-        })
+        ans_stat = AnswersStat(correct_answers, [], self.weight, self.grading_type,
+                               self.answer_matching)
+
+        def reset(state):
+            attempts = state['attempts']
+            # backward compatibility for the case if self.attempts == 0 but answer was saved
+            if state['user_answers'] and attempts == 0:
+                attempts = 1
+            # answers can't be submitted again without attempts left, keep the last ones
+            if 0 < self.max_attempts_number <= attempts:
+                return None, "No attempts left"
+            # answers submitted after the reset are a new submission, whatever their id
+            return {'user_answers': [], 'draft_answers': [], 'attempts': attempts, 'last_submission_id': None}, None
 
+        try:
+            error = update_state(self.state_store, self, reset)
+        except StateConflict:
+            error = "Please, try again"
+        if error:
+            return {'result': 'error', 'message': error}
+        self._update_answer_statistics({})
         event_type = 'xblock.text-highlighter.reset_submission'
-        data['user_id'] = self.scope_ids.user_id
-        data['correct_answers'] = correct_answers
-        data['user_answers'] = []
-        data['new_attempt'] = True
-        data['percent_completion'] = float(round(ans_stat.percent_completion, 2))
-        data['weighted_percent_completion'] = float(round(ans_stat.weighted_percent_completion, 2))
-        data['max_grade'] = 1
-        data['weight'] = self.weight
-        data['grading_type'] = self.grading_type
-        data['display_name'] = self.display_name
-        data['description'] = self.description
-        data['text'] = self.text
-        data['correct_answers'] = self.correct_answers
-        data['user_answers'] = self.user_answers
-        data['correctness_available'] = correctness_available
-        data['attempts'] = self.attempts
-        data['max_attempts_number'] = self.max_attempts_number
-
-        self.runtime.publish(self, event_type, data)
+        with self._timer('reset_answers.publish'):
+            self._publish('progress', {})
+            self._publish('grade', {
+                'value': ans_stat.percent_completion,
+                'max_value': 1,
+            })
+            self._publish_submission_event(event_type, data, ans_stat, correctness_available)
 
         return {
             'grade_text': self.get_grade_text(ans_stat, correctness_available),
@@ -0,0 +1,176 @@
+"""
+Token index of passages written for the tokenized highlighting system.
+
+The index is built once when the block is saved in Studio and stored in the block settings:
+
+    {
+        'text_hash': '<hash of the text the offsets refer to>',
+        'tokens': [[open_start, content_start, content_end, close_end, 'normalized text'], ...],
+        'answers': {'correct answer': token_id, ...},
+    }
+
+Token ids are positions in the `tokens` list, i.e. tokens are numbered in document order. The index is only
+valid for the text it was built from, the text may be changed without the editor (OLX edits, imports), so
+the block compares `text_hash` with the hash of its current text before using it.
+"""
+from __future__ import absolute_import
+
+import html
+import re
+import typing as t
+from html.parser import HTMLParser
+
+RE_TOKEN = re.compile(r"<token>(.*?)</token>", re.IGNORECASE | re.DOTALL)
+RE_TAG = re.compile(r"<[^>]*>")
+RE_COMBINE_WHITESPACE = re.compile(r"\s+")
+
+TOKEN_OPEN_TAG = '<span class="th-cl-token" data-th-token-id="%d">'
+TOKEN_CLOSE_TAG = '</span>'
+
+OPEN_START, CONTENT_START, CONTENT_END, CLOSE_END, TOKEN_TEXT = range(5)
+
+
+def normalize_token_text(content: str) -> str:
+    """
+    Returns the token text the way learners' answers are stored: markup removed, entities decoded
+    and whitespace collapsed.
+    """
+    text = html.unescape(RE_TAG.sub("", content))
+    return RE_COMBINE_WHITESPACE.sub(" ", text).strip()
+
+
+class OffsetHTMLParser(HTMLParser):
+    """
+    Stdlib HTML parser of a whole text, reporting the offset of the current tag in the text.
+
+    Comments, CDATA sections and the content of `<script>` and `<style>` elements are not parsed as markup.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(convert_charrefs=True)
+        self.text = text
+        self._line_offsets = [0]
+        self._line_offsets.extend(match.end() for match in re.finditer("\n", text))
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+
+class TokenParser(OffsetHTMLParser):
+    """
+    Streaming collector of `<token>` elements built on the stdlib HTML parser.
+
+    Collects the offsets and the text content of every top-level token in one pass without building a tree,
+    markup nested inside a token contributes its text only.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.tokens = []
+        self._token_start = None
+        self._token_depth = 0
+        self._token_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'token':
+            return
+        if self._token_depth == 0:
+            start = self._offset()
+            self._token_start = (start, start + len(self.get_starttag_text()))
+            self._token_parts = []
+        self._token_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        if tag != 'token' or self._token_depth == 0:
+            return
+        self._token_depth -= 1
+        if self._token_depth == 0:
+            close_start = self._offset()
+            close_end = self.text.index('>', close_start) + 1
+            open_start, content_start = self._token_start
+            token_text = RE_COMBINE_WHITESPACE.sub(" ", "".join(self._token_parts)).strip()
+            self.tokens.append([open_start, content_start, close_start, close_end, token_text])
+
+    def handle_data(self, data):
+        if self._token_depth:
+            self._token_parts.append(data)
+
+    def parse(self) -> t.List[list]:
+        self.feed(self.text)
+        self.close()
+        return self.tokens
+
+
+def _find_tokens_re(text: str) -> t.List[list]:
+    return [[match.start(), match.start(1), match.end(1), match.end(), normalize_token_text(match.group(1))]
+            for match in RE_TOKEN.finditer(text)]
+
+
+def find_tokens(text: str) -> t.List[list]:
+    """
+    Returns `[open_start, content_start, content_end, close_end, normalized text]` of every token in the text.
+    """
+    try:
+        return TokenParser(text).parse()
+    except Exception:  # pylint: disable=broad-except
+        # the stdlib parser is lenient and hardly ever fails, fall back to plain tag matching if it does
+        return _find_tokens_re(text)
+
+
+def build_token_index(text: str, correct_answers: t.List[str], text_hash: str,
+                      tokens: t.Optional[t.List[list]] = None) -> t.Dict[str, t.Any]:
+    if tokens is None:
+        tokens = find_tokens(text)
+    correct_answers_set = set(correct_answers)
+    answers = {}
+    for token_id, token in enumerate(tokens):
+        token_text = token[TOKEN_TEXT]
+        if token_text in correct_answers_set and token_text not in answers:
+            answers[token_text] = token_id
+    return {
+        'text_hash': text_hash,
+        'tokens': tokens,
+        'answers': answers,
+    }
+
+
+def render_tokenized_text(text: str, token_index: t.Dict[str, t.Any], start=0, end=None, first_token_id=0) -> str:
+    """
+    Replaces `<token>` tags with highlighter spans carrying the token ids in a single pass over the text.
+
+    `start`, `end` and `first_token_id` render a part of the text only, with the token ids of the whole text.
+    """
+    if end is None:
+        end = len(text)
+    tokens = token_index['tokens']
+    parts = []
+    position = start
+    for token_id in range(first_token_id, len(tokens)):
+        token = tokens[token_id]
+        if token[OPEN_START] >= end:
+            break
+        parts.append(text[position:token[OPEN_START]])
+        parts.append(TOKEN_OPEN_TAG % token_id)
+        parts.append(text[token[CONTENT_START]:token[CONTENT_END]])
+        parts.append(TOKEN_CLOSE_TAG)
+        position = token[CLOSE_END]
+    parts.append(text[position:end])
+    return "".join(parts)
+
+
+def resolve_token_ids(token_ids: t.List[t.Any], token_index: t.Dict[str, t.Any]) -> t.Optional[t.List[str]]:
+    """
+    Returns the sorted unique texts of the given tokens, or None if any id is not a valid token id.
+    """
+    tokens = token_index['tokens']
+    texts = set()
+    for token_id in token_ids:
+        if not isinstance(token_id, int) or isinstance(token_id, bool) or not 0 <= token_id < len(tokens):
+            return None
+        if tokens[token_id][TOKEN_TEXT]:
+            texts.add(tokens[token_id][TOKEN_TEXT])
+    return sorted(texts)